@@ -3,19 +3,7 @@ from django.contrib import admin
 from django.urls import reverse
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
-from .models import NetworkNode, Product
-
-
-@admin.action(description=_("Clear debt for selected nodes"))
-def clear_debt(modeladmin, request, queryset):
-    """
-    Admin action to clear debt for selected NetworkNode objects.
-    Sets debt to 0 for all objects in the queryset.
-    """
-    updated = queryset.update(debt=0)
-    modeladmin.message_user(
-        request, _(f"Debt cleared for {updated} selected network nodes.")
-    )
+from .models import DebtLedgerEntry, NetworkNode, Product
 
 
 class NetworkNodeAdmin(admin.ModelAdmin):
@@ -36,7 +24,20 @@ class NetworkNodeAdmin(admin.ModelAdmin):
     list_filter = ("city", "country", "node_type", "level")
     search_fields = ("name", "email", "city", "country")
     readonly_fields = ("created_at", "level")
-    actions = [clear_debt]
+    actions = ["clear_debt"]
+
+    @admin.action(description=_("Clear debt for selected nodes"))
+    def clear_debt(self, request, queryset):
+        """
+        Admin action to clear debt for selected NetworkNode objects.
+        Sets debt to 0 with one UPDATE and records the cleared amounts in
+        the debt ledger, statistics and subtree rollups in the same
+        transaction.
+        """
+        updated = NetworkNode.clear_debts(queryset)
+        self.message_user(
+            request, _(f"Debt cleared for {updated} selected network nodes.")
+        )
 
     def supplier_link(self, obj):
         """
@@ -57,6 +58,26 @@ class NetworkNodeAdmin(admin.ModelAdmin):
     supplier_link.short_description = _("Supplier")
 
 
+class DebtLedgerEntryAdmin(admin.ModelAdmin):
+    """
+    Read-only admin for the append-only debt ledger.
+    """
+
+    list_display = ("node", "kind", "amount", "created_at")
+    list_filter = ("kind",)
+    list_select_related = ("node",)
+    raw_id_fields = ("node",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 class ProductAdmin(admin.ModelAdmin):
     """
     Admin configuration for Product model.
@@ -71,3 +92,4 @@ class ProductAdmin(admin.ModelAdmin):
 # Register all models with their admin classes
 admin.site.register(NetworkNode, NetworkNodeAdmin)
 admin.site.register(Product, ProductAdmin)
+admin.site.register(DebtLedgerEntry, DebtLedgerEntryAdmin)
@@ -20,3 +20,7 @@ class NetworkConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "network"
+
+    def ready(self):
+        """Register signal handlers and system checks of the application."""
+        from . import checks, signals  # noqa: F401
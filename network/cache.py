@@ -0,0 +1,142 @@
+"""
+Cache helpers of the network application.
+
+Cached data is keyed on per-model generation counters. Every write bumps
+the generation of the written model, so entries built from older data are
+never read again and simply expire from the cache. The time of the last
+bump is kept next to the counter for ``Last-Modified`` headers, and the
+number of bumps is counted for monitoring.
+"""
+
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+GENERATION_KEY = "network:generation:{}"
+MODIFIED_KEY = "network:modified:{}"
+INVALIDATIONS_KEY = "network:invalidations:{}"
+TREE_CACHE_KEY = "network:tree:{}"
+
+
+def get_generation(model):
+    """Return the current generation counter of ``model``."""
+    key = GENERATION_KEY.format(model._meta.label_lower)
+    generation = cache.get(key)
+    if generation is None:
+        # A wall clock seed never repeats a generation after eviction
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def get_last_modified(model):
+    """Return the time of the last write to ``model`` as a timestamp."""
+    key = MODIFIED_KEY.format(model._meta.label_lower)
+    modified = cache.get(key)
+    if modified is None:
+        # Unknown after eviction, so assume a write happened just now
+        cache.add(key, time.time(), timeout=None)
+        modified = cache.get(key)
+    return modified
+
+
+def get_versions(models):
+    """
+    Return ``(generation, last modified)`` of every model in ``models``.
+
+    All counters are read with one cache round trip; missing ones are
+    seeded like ``get_generation`` and ``get_last_modified`` do.
+    """
+    labels = [model._meta.label_lower for model in models]
+    values = cache.get_many([
+        key.format(label)
+        for label in labels for key in (GENERATION_KEY, MODIFIED_KEY)
+    ])
+    versions = []
+    for model, label in zip(models, labels):
+        generation = values.get(GENERATION_KEY.format(label))
+        modified = values.get(MODIFIED_KEY.format(label))
+        versions.append((
+            get_generation(model) if generation is None else generation,
+            get_last_modified(model) if modified is None else modified,
+        ))
+    return versions
+
+
+def normalized_query(request):
+    """
+    Return the query parameters of ``request`` as a string that does not
+    depend on their order in the URL.
+    """
+    return "&".join(
+        f"{name}={value}"
+        for name, values in sorted(request.query_params.lists())
+        for value in values
+    )
+
+
+class CacheModelsMixin:
+    """
+    Declares the models the ``list`` and ``retrieve`` responses of a
+    viewset are built from, and so which writes invalidate them.
+    """
+
+    cache_models = ()
+
+    def get_cache_models(self):
+        """Return the models the response of the current action reads."""
+        return self.cache_models or [self.queryset.model]
+
+
+def increment(key, cache=cache):
+    """Atomically increment the counter ``key``, creating it if needed."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
+
+
+def get_invalidation_count(model):
+    """Return how often the generation of ``model`` was bumped."""
+    return cache.get(INVALIDATIONS_KEY.format(model._meta.label_lower), 0)
+
+
+def bump_generation(model):
+    """Invalidate every cache entry built from ``model`` data."""
+    cache.set(
+        MODIFIED_KEY.format(model._meta.label_lower), time.time(),
+        timeout=None,
+    )
+    increment(INVALIDATIONS_KEY.format(model._meta.label_lower))
+    key = GENERATION_KEY.format(model._meta.label_lower)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        generation = time.time_ns()
+        cache.set(key, generation, timeout=None)
+        return generation
+
+
+def bump_generation_on_commit(model):
+    """Bump the generation once the current transaction is committed."""
+    transaction.on_commit(partial(bump_generation, model))
+
+
+def get_network_tree():
+    """Return the whole supplier tree, building it on a cache miss."""
+    from .hierarchy import build_network_tree
+    from .models import NetworkNode
+
+    key = TREE_CACHE_KEY.format(get_generation(NetworkNode))
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_network_tree()
+        cache.set(
+            key, tree, getattr(settings, "NETWORK_TREE_CACHE_TIMEOUT", 300)
+        )
+    return tree
@@ -0,0 +1,41 @@
+"""
+System checks of the network application.
+"""
+
+from django.conf import settings
+from django.core.checks import Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Warn when cross-process features rely on a process-local cache.
+
+    Generation counters live in the ``default`` cache. With a local-memory
+    backend a write handled by one worker does not invalidate the response
+    cache of the others, which keep serving stale responses.
+    """
+    backend = settings.CACHES["default"]["BACKEND"]
+    if settings.DEBUG or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    features = []
+    if getattr(settings, "NETWORK_RESPONSE_CACHE_TIMEOUT", 0):
+        features.append("NETWORK_RESPONSE_CACHE_TIMEOUT")
+    if getattr(settings, "NETWORK_COALESCE_SHARED", False):
+        features.append("NETWORK_COALESCE_SHARED")
+    if not features:
+        return []
+    return [
+        Warning(
+            f"{', '.join(features)} requires a cache shared by all worker "
+            "processes, but the default cache is process-local.",
+            hint="Set NETWORK_CACHE_BACKEND and NETWORK_CACHE_LOCATION to "
+            "a shared backend such as Redis or Memcached.",
+            id="network.W001",
+        )
+    ]
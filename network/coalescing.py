@@ -0,0 +1,227 @@
+"""
+Single-flight request coalescing for expensive read-only actions.
+
+Concurrent identical requests share one in-flight computation instead of
+each running the same aggregate queries. The result is kept for a short
+TTL, per process and optionally in the ``default`` Django cache so that
+workers of other processes can reuse it as well; that cache must then be
+shared by the workers. Results read from the shared cache count as hits.
+"""
+
+import logging
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import normalized_query
+
+logger = logging.getLogger(__name__)
+
+HIT = "hit"
+MISS = "miss"
+COALESCED = "coalesced"
+STATUS_HEADER = "X-Coalescing"
+CACHE_KEY = "network:coalesce:{}"
+LOCK_KEY = "network:coalesce-lock:{}"
+
+
+class _Call:
+    """A computation in flight, awaited by the coalesced callers."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Uncacheable(Exception):
+    """Carries a response that must not be shared with other callers."""
+
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+class SingleFlight:
+    """
+    Per-process single-flight group.
+
+    The first caller for a key computes the value, callers arriving while
+    it runs wait for the same result, and callers arriving within ``ttl``
+    seconds afterwards get the stored result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._results = {}
+        self._counters = {HIT: 0, MISS: 0, COALESCED: 0}
+
+    def do(self, key, func, ttl):
+        """Return ``(value, outcome)`` for ``key``, computing it once."""
+        with self._lock:
+            expires, value = self._results.get(key, (0, None))
+            if expires > time.monotonic():
+                self._counters[HIT] += 1
+                return value, HIT
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counters[MISS] += 1
+            else:
+                self._counters[COALESCED] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, COALESCED
+
+        try:
+            call.result = func()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and ttl > 0:
+                    self._store(key, call.result, ttl)
+            call.done.set()
+        return call.result, MISS
+
+    def _store(self, key, value, ttl):
+        now = time.monotonic()
+        self._results = {
+            stored_key: stored
+            for stored_key, stored in self._results.items()
+            if stored[0] > now
+        }
+        self._results[key] = (now + ttl, value)
+
+    def count_shared_hit(self):
+        """Count a miss that was answered by another process as a hit."""
+        with self._lock:
+            self._counters[MISS] -= 1
+            self._counters[HIT] += 1
+
+    def stats(self):
+        """Return a snapshot of the hit/miss/coalesced counters."""
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self):
+        """Forget stored results and counters."""
+        with self._lock:
+            self._results.clear()
+            self._counters = dict.fromkeys(self._counters, 0)
+
+
+flight = SingleFlight()
+
+
+def coalescing_stats():
+    """Return hit/miss/coalesced counters of this process."""
+    return flight.stats()
+
+
+def _shared_compute(key, func, ttl, lock_timeout):
+    """
+    Compute ``func`` once across processes through the Django cache.
+
+    Returns ``(value, computed)``, ``computed`` being false when another
+    process stored the value.
+    """
+    cache_key = CACHE_KEY.format(key)
+    lock_key = LOCK_KEY.format(key)
+    deadline = time.monotonic() + lock_timeout
+    while True:
+        value = cache.get(cache_key)
+        if value is not None:
+            return value, False
+        if cache.add(lock_key, True, lock_timeout):
+            try:
+                value = func()
+                cache.set(cache_key, value, ttl)
+            finally:
+                cache.delete(lock_key)
+            return value, True
+        if time.monotonic() > deadline:
+            # The lock holder is too slow or gone, compute it ourselves
+            return func(), True
+        time.sleep(0.05)
+
+
+def coalesce(ttl=None, shared=None, lock_timeout=10):
+    """
+    Coalesce concurrent identical requests to a viewset action.
+
+    Requests are identical when they hit the same action with the same
+    path and query parameters. Only successful responses are shared.
+
+    Args:
+        ttl: Seconds a computed response is reused, by default the
+            ``NETWORK_COALESCE_TTL`` setting.
+        shared: Also coalesce across processes via a cache-backed lock,
+            by default the ``NETWORK_COALESCE_SHARED`` setting.
+        lock_timeout: Seconds to wait for another process before
+            computing the response locally.
+    """
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(view, request, *args, **kwargs):
+            key = "{}.{}:{}?{}".format(
+                type(view).__name__,
+                view_method.__name__,
+                request.path,
+                normalized_query(request),
+            )
+            result_ttl = (
+                getattr(settings, "NETWORK_COALESCE_TTL", 1)
+                if ttl is None else ttl
+            )
+            use_cache = (
+                getattr(settings, "NETWORK_COALESCE_SHARED", False)
+                if shared is None else shared
+            )
+
+            def compute():
+                response = view_method(view, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    raise _Uncacheable(response)
+                return response.data
+
+            shared_hit = False
+
+            def run():
+                nonlocal shared_hit
+                if not use_cache:
+                    return compute()
+                value, computed = _shared_compute(
+                    key, compute, result_ttl, lock_timeout
+                )
+                shared_hit = not computed
+                return value
+
+            try:
+                data, outcome = flight.do(key, run, result_ttl)
+            except _Uncacheable as uncacheable:
+                return uncacheable.response
+            if shared_hit:
+                flight.count_shared_hit()
+                outcome = HIT
+            logger.debug("%s %s %s", key, outcome, flight.stats())
+            response = Response(data)
+            response[STATUS_HEADER] = outcome
+            return response
+
+        return wrapper
+
+    return decorator
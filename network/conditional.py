@@ -0,0 +1,78 @@
+"""
+Conditional GET support for the network API.
+
+ETags are derived from the generation counters of the models a response
+is built from, together with the request URL and the negotiated media
+type. Every write path bumps those counters in the shared ``default``
+cache once its transaction commits, so an unchanged list or object is
+answered with ``304 Not Modified`` before any query runs or anything is
+serialized.
+"""
+
+import math
+import time
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.crypto import md5
+from django.utils.http import http_date
+
+from .cache import CacheModelsMixin, get_versions
+
+
+def get_etag(request, versions):
+    """Return the ETag of ``request`` for the model ``versions``."""
+    generations = ":".join(str(generation) for generation, _ in versions)
+    key = (
+        f"{request.get_full_path()}|{request.accepted_media_type}|"
+        f"{generations}"
+    )
+    return f'"{md5(key.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+def get_last_modified(versions):
+    """
+    Return the ``Last-Modified`` timestamp of the model ``versions``.
+
+    HTTP dates have whole seconds, so the last write is rounded up.
+    Returns ``None`` while that second is not over yet, as another write
+    in the same second would not change the header.
+    """
+    last_modified = math.ceil(max(modified for _, modified in versions))
+    if last_modified > time.time():
+        return None
+    return last_modified
+
+
+class ConditionalGetMixin(CacheModelsMixin):
+    """
+    Adds ``ETag`` and ``Last-Modified`` headers to ``list`` and
+    ``retrieve`` and answers matching conditional requests with 304.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        """Run ``handler`` unless the client copy is still current."""
+        versions = get_versions(self.get_cache_models())
+        etag = get_etag(request, versions)
+        last_modified = get_last_modified(versions)
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        patch_vary_headers(response, ["Accept"])
+        return response
@@ -0,0 +1,52 @@
+"""
+Whole-network hierarchy helpers.
+
+Builds nested structures of the supplier tree in memory from flat
+``values()`` rows instead of following ``supplier`` one node at a time.
+"""
+
+from decimal import Decimal
+
+from .models import NetworkNode
+
+TREE_FIELDS = ("id", "name", "node_type", "supplier_id", "level", "debt")
+CENTS = Decimal("0.01")
+
+
+def build_network_tree(queryset=None, chunk_size=2000):
+    """Assemble the supplier tree from a single query in O(N).
+
+    Rows are read level by level, so every supplier is placed before its
+    clients. Nodes whose supplier is not part of ``queryset`` become roots.
+
+    Args:
+        queryset: Nodes to include, all nodes by default.
+        chunk_size: Number of rows fetched from the cursor at a time.
+
+    Returns:
+        list: Root nodes, each with a nested ``clients`` list.
+    """
+    if queryset is None:
+        queryset = NetworkNode.objects.all()
+    rows = (
+        queryset.order_by("level", "id")
+        .values_list(*TREE_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+
+    roots = []
+    children = {}
+    for pk, name, node_type, supplier_id, level, debt in rows:
+        clients = []
+        children[pk] = clients
+        node = {
+            "id": pk,
+            "name": name,
+            "node_type": node_type,
+            "level": level,
+            "debt": str(debt.quantize(CENTS)),
+            "clients": clients,
+        }
+        siblings = children.get(supplier_id)
+        (roots if siblings is None else siblings).append(node)
+    return roots
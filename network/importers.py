@@ -0,0 +1,396 @@
+"""
+Bulk import of NetworkNode hierarchies and batch upserts of products.
+
+For nodes the whole input is validated in memory first: field values,
+supplier references, the "factory cannot have a supplier" rule and cycles.
+Valid rows are then sorted topologically by supplier and inserted level by
+level with ``bulk_create`` in one transaction, with paths, levels and all
+rollups computed in a single pass instead of per-row ``save()`` calls.
+
+Products are upserted with ``bulk_create`` and their node assignments are
+written to the through table with one ``bulk_create`` per batch.
+"""
+
+from collections import defaultdict
+from collections.abc import Mapping
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .cache import bump_generation_on_commit
+from .models import (
+    PATH_SEPARATOR, ChangeLog, DebtLedgerEntry, NetworkNode,
+    NetworkStatistic, Product,
+)
+from .serializers import ProductBatchItemSerializer
+
+NODE_FIELDS = (
+    "name", "email", "country", "city", "street", "house_number",
+    "node_type", "debt",
+)
+DERIVED_FIELDS = ("supplier", "level", "path", "subtree_debt", "subtree_count")
+PRODUCT_FIELDS = ("name", "model", "release_date", "price", "quantity")
+
+
+class NodeImportError(Exception):
+    """Raised when import rows are invalid; nothing is written then.
+
+    Attributes:
+        errors (list): ``{"row": index, "errors": {...}}`` per invalid row.
+    """
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid rows.")
+        self.errors = errors
+
+
+class _Row:
+    """An import row resolved to an unsaved node and its supplier."""
+
+    def __init__(self, index, node, ref, supplier_id, supplier_ref):
+        self.index = index
+        self.node = node
+        self.ref = ref
+        self.supplier_id = supplier_id
+        self.supplier_ref = supplier_ref
+        self.parent = None
+        self.depth = None
+        self.errors = {}
+
+
+def _parse_row(index, data):
+    """Build an unsaved node from one input mapping."""
+    if not isinstance(data, Mapping):
+        row = _Row(index, NetworkNode(), None, None, None)
+        row.errors["non_field_errors"] = ["Expected an object."]
+        return row
+    values = {
+        field: data[field]
+        for field in NODE_FIELDS
+        if data.get(field) not in (None, "")
+    }
+    node = NetworkNode(**values)
+    row = _Row(
+        index,
+        node,
+        ref=str(data["ref"]) if data.get("ref") not in (None, "") else None,
+        supplier_id=data.get("supplier") or None,
+        supplier_ref=(
+            str(data["supplier_ref"])
+            if data.get("supplier_ref") not in (None, "") else None
+        ),
+    )
+    try:
+        node.clean_fields(exclude=DERIVED_FIELDS)
+    except ValidationError as error:
+        row.errors.update(error.message_dict)
+    if row.supplier_id is not None:
+        try:
+            row.supplier_id = int(row.supplier_id)
+        except (TypeError, ValueError):
+            row.supplier_id = None
+            row.errors["supplier"] = ["A valid node id is required."]
+    if row.supplier_id is not None and row.supplier_ref is not None:
+        row.errors["supplier"] = [
+            "Use either supplier or supplier_ref, not both."
+        ]
+    if node.node_type == "factory" and (row.supplier_id or row.supplier_ref):
+        row.errors["supplier"] = ["A factory cannot have a supplier."]
+    return row
+
+
+def _resolve_suppliers(rows):
+    """Link rows to in-batch suppliers and load existing supplier paths."""
+    by_ref = {}
+    for row in rows:
+        if row.ref is None:
+            continue
+        if row.ref in by_ref:
+            row.errors["ref"] = ["Duplicate ref."]
+        by_ref[row.ref] = row
+
+    for row in rows:
+        if row.supplier_ref is not None:
+            row.parent = by_ref.get(row.supplier_ref)
+            if row.parent is None:
+                row.errors["supplier_ref"] = ["Unknown supplier_ref."]
+
+    supplier_ids = {row.supplier_id for row in rows if row.supplier_id}
+    existing = dict(
+        NetworkNode.objects.filter(pk__in=supplier_ids).values_list(
+            "pk", "path"
+        )
+    )
+    for row in rows:
+        if row.supplier_id and row.supplier_id not in existing:
+            row.errors["supplier"] = ["Supplier does not exist."]
+    return existing
+
+
+def _sort_topologically(rows):
+    """Assign in-batch depths, flagging rows on or below a cycle."""
+    for row in rows:
+        chain = []
+        on_chain = set()
+        current = row
+        while (current is not None and current.depth is None
+               and current.index not in on_chain):
+            chain.append(current)
+            on_chain.add(current.index)
+            current = current.parent
+
+        if current is not None and current.depth is None:
+            error = "Circular reference detected."
+        elif current is not None and current.depth < 0:
+            error = "Supplier is part of a circular reference."
+        else:
+            depth = -1 if current is None else current.depth
+            for item in reversed(chain):
+                depth += 1
+                item.depth = depth
+            continue
+        for item in chain:
+            item.depth = -1
+            item.errors.setdefault("supplier_ref", [error])
+
+    return sorted(
+        (row for row in rows if row.depth >= 0), key=lambda row: row.depth
+    )
+
+
+def import_nodes(data, batch_size=1000):
+    """
+    Validate and insert a batch of nodes in one transaction.
+
+    Each input mapping holds the NetworkNode fields and optionally ``ref``,
+    an import-local key, plus either ``supplier`` (id of an existing node)
+    or ``supplier_ref`` (``ref`` of another row of the same batch).
+
+    Args:
+        data: Iterable of mappings, one per node.
+        batch_size: Rows per INSERT statement.
+
+    Returns:
+        list: The created nodes in input order.
+
+    Raises:
+        NodeImportError: If any row is invalid.
+    """
+    rows = [_parse_row(index, item) for index, item in enumerate(data)]
+    existing_paths = _resolve_suppliers(rows)
+    ordered = _sort_topologically(rows)
+
+    errors = [
+        {"row": row.index, "errors": row.errors} for row in rows if row.errors
+    ]
+    if errors:
+        raise NodeImportError(errors)
+
+    # Subtree rollups of new nodes, accumulated from the deepest level up
+    for row in ordered:
+        row.node.debt = Decimal(str(row.node.debt or 0))
+        row.node.subtree_debt = row.node.debt
+        row.node.subtree_count = 1
+    for row in reversed(ordered):
+        if row.parent is not None:
+            row.parent.node.subtree_debt += row.node.subtree_debt
+            row.parent.node.subtree_count += row.node.subtree_count
+
+    with transaction.atomic():
+        # Existing suppliers and their ancestors are locked in pk order,
+        # like on every node write, and their paths are read again
+        locked = NetworkNode._lock_nodes(existing_paths)
+        errors = [
+            {"row": row.index,
+             "errors": {"supplier": ["Supplier does not exist."]}}
+            for row in rows
+            if row.supplier_id and row.supplier_id not in locked
+        ]
+        if errors:
+            raise NodeImportError(errors)
+        existing_paths = {pk: node.path for pk, node in locked.items()}
+
+        for depth_rows in _group_by_depth(ordered):
+            for row in depth_rows:
+                node = row.node
+                if row.parent is not None:
+                    supplier = row.parent.node
+                    node.supplier_id = supplier.pk
+                    node.path = supplier.get_descendants_path()
+                elif row.supplier_id is not None:
+                    node.supplier_id = row.supplier_id
+                    node.path = (
+                        f"{existing_paths[row.supplier_id]}"
+                        f"{row.supplier_id}{PATH_SEPARATOR}"
+                    )
+                else:
+                    node.path = PATH_SEPARATOR
+                node.level = node.get_hierarchy_level()
+            NetworkNode.objects.bulk_create(
+                [row.node for row in depth_rows], batch_size=batch_size
+            )
+
+        NetworkNode.apply_subtree_deltas(_ancestor_deltas(ordered))
+        NetworkStatistic.apply(_statistic_deltas(ordered))
+        ChangeLog.record(
+            ChangeLog.NODE, ChangeLog.CREATED,
+            [row.node.pk for row in ordered],
+        )
+        DebtLedgerEntry.objects.bulk_create(
+            [
+                DebtLedgerEntry(
+                    node=row.node, amount=row.node.debt,
+                    kind=DebtLedgerEntry.ADJUSTMENT,
+                )
+                for row in ordered if row.node.debt
+            ],
+            batch_size=batch_size,
+        )
+    bump_generation_on_commit(NetworkNode)
+    return [row.node for row in rows]
+
+
+def _group_by_depth(ordered):
+    groups = defaultdict(list)
+    for row in ordered:
+        groups[row.depth].append(row)
+    return [groups[depth] for depth in sorted(groups)]
+
+
+def _ancestor_deltas(ordered):
+    """Rollup increments of existing ancestors of the imported roots."""
+    deltas = {}
+    for row in ordered:
+        if row.parent is not None or row.supplier_id is None:
+            continue
+        for pk in row.node.get_ancestor_ids():
+            debt, count = deltas.get(pk, (0, 0))
+            deltas[pk] = (
+                debt + row.node.subtree_debt, count + row.node.subtree_count
+            )
+    return deltas
+
+
+def _statistic_deltas(ordered):
+    groups = defaultdict(lambda: [0, Decimal(0)])
+    for row in ordered:
+        group = groups[(row.node.level, row.node.country)]
+        group[0] += 1
+        group[1] += row.node.debt
+    deltas = {}
+    for (level, country), (count, debt) in groups.items():
+        NetworkStatistic.merge(
+            deltas,
+            NetworkStatistic.node_deltas(level, country, debt, count=count),
+        )
+    return deltas
+
+
+def upsert_products(items, batch_size=1000):
+    """
+    Create or update products with their node assignments in batches.
+
+    Invalid items are skipped and reported, valid ones are written. An
+    item with ``nodes`` replaces the node set of its product.
+
+    Args:
+        items: List of product mappings, with ``id`` for updates.
+        batch_size: Items written per transaction.
+
+    Returns:
+        dict: ``created`` and ``updated`` ids in input order and ``errors``
+        as ``{"index": index, "errors": {...}}`` per skipped item.
+    """
+    result = {"created": [], "updated": [], "errors": []}
+    for start in range(0, len(items), batch_size):
+        batch = list(enumerate(items[start:start + batch_size], start))
+        _upsert_product_batch(batch, result)
+    bump_generation_on_commit(Product)
+    return result
+
+
+def _upsert_product_batch(batch, result):
+    valid = []
+    for index, item in batch:
+        serializer = ProductBatchItemSerializer(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            result["errors"].append(
+                {"index": index, "errors": serializer.errors}
+            )
+
+    product_ids = {data["id"] for _, data in valid if "id" in data}
+    node_ids = {pk for _, data in valid for pk in data.get("nodes", ())}
+    existing_products = set(
+        Product.objects.filter(pk__in=product_ids).values_list(
+            "pk", flat=True
+        )
+    )
+    existing_nodes = set(
+        NetworkNode.objects.filter(pk__in=node_ids).values_list(
+            "pk", flat=True
+        )
+    )
+
+    to_create, to_update = [], []
+    seen_ids = set()
+    for index, data in valid:
+        errors = {}
+        if "id" in data and data["id"] not in existing_products:
+            errors["id"] = ["Product does not exist."]
+        elif "id" in data and data["id"] in seen_ids:
+            errors["id"] = ["Product is listed twice in the batch."]
+        seen_ids.add(data.get("id"))
+        missing = sorted(set(data.get("nodes", ())) - existing_nodes)
+        if missing:
+            errors["nodes"] = [f"Unknown node ids: {missing}."]
+        if errors:
+            result["errors"].append({"index": index, "errors": errors})
+            continue
+        product = Product(
+            pk=data.get("id"),
+            **{field: data[field] for field in PRODUCT_FIELDS if field in data}
+        )
+        (to_update if "id" in data else to_create).append((product, data))
+
+    through = Product.nodes.through
+    with transaction.atomic():
+        Product.objects.bulk_create([product for product, _ in to_create])
+        # Omitted fields keep their values, as with a regular update
+        updates = defaultdict(list)
+        for product, data in to_update:
+            fields = tuple(field for field in PRODUCT_FIELDS if field in data)
+            updates[fields].append(product)
+        for fields, products in updates.items():
+            Product.objects.bulk_create(
+                products,
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=[*fields, "updated_at"],
+            )
+        assigned = [
+            (product, data["nodes"])
+            for product, data in to_create + to_update
+            if "nodes" in data
+        ]
+        through.objects.filter(
+            product_id__in=[product.pk for product, _ in assigned]
+        ).delete()
+        through.objects.bulk_create(
+            through(product_id=product.pk, networknode_id=node_id)
+            for product, nodes in assigned
+            for node_id in dict.fromkeys(nodes)
+        )
+        ChangeLog.record(
+            ChangeLog.PRODUCT, ChangeLog.CREATED,
+            [product.pk for product, _ in to_create],
+        )
+        ChangeLog.record(
+            ChangeLog.PRODUCT, ChangeLog.UPDATED,
+            [product.pk for product, _ in to_update],
+        )
+
+    result["created"].extend(product.pk for product, _ in to_create)
+    result["updated"].extend(product.pk for product, _ in to_update)
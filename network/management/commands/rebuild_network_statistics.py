@@ -0,0 +1,55 @@
+"""
+Management command rebuilding the NetworkStatistic rollups.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from network.models import NetworkStatistic
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the statistics rollups from the live node table and verify
+    them against the live aggregates.
+
+    With ``--verify-only`` the rollups are left untouched and the command
+    fails if they drifted from the live aggregates.
+    """
+
+    help = "Rebuild and verify the network statistics rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="Only compare the rollups with the live aggregates.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["verify_only"]:
+            NetworkStatistic.rebuild()
+            self.stdout.write("Statistics rollups rebuilt.")
+
+        mismatches = self.compare(
+            NetworkStatistic.stored_rows(), NetworkStatistic.live_rows()
+        )
+        for (dimension, key), stored, live in mismatches:
+            self.stderr.write(
+                f"{dimension}:{key} stored={stored} live={live}"
+            )
+        if mismatches:
+            raise CommandError(
+                f"{len(mismatches)} statistics rollups differ from the "
+                "live aggregates."
+            )
+        self.stdout.write(self.style.SUCCESS("Statistics rollups verified."))
+
+    @staticmethod
+    def compare(stored, live):
+        """Return ``(key, stored, live)`` for every differing rollup."""
+        empty = (0, 0)
+        return [
+            (key, stored.get(key, empty), live.get(key, empty))
+            for key in sorted(set(stored) | set(live))
+            if stored.get(key, empty) != live.get(key, empty)
+        ]
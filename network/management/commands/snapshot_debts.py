@@ -0,0 +1,60 @@
+"""
+Management command recording the daily debt snapshot of all nodes.
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from network.models import DebtSnapshot
+
+
+class Command(BaseCommand):
+    """
+    Snapshot the debt of every node and downsample old daily snapshots.
+
+    Meant to run once a day. Daily snapshots of months that ended more
+    than ``--keep-days`` ago are replaced by the last snapshot of their
+    month.
+    """
+
+    help = "Record the daily debt snapshot and downsample old snapshots."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help="Snapshot date as YYYY-MM-DD, today by default.",
+        )
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=90,
+            help="Days of daily snapshots kept before downsampling.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Snapshot rows per INSERT statement.",
+        )
+
+    def handle(self, *args, **options):
+        if options["date"]:
+            try:
+                day = date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError("--date must be formatted as YYYY-MM-DD.")
+        else:
+            day = timezone.localdate()
+        if options["keep_days"] < 0:
+            raise CommandError("--keep-days must not be negative.")
+
+        created = DebtSnapshot.take(day, batch_size=options["batch_size"])
+        self.stdout.write(f"Recorded {created} debt snapshots for {day}.")
+        months = DebtSnapshot.downsample(
+            day - timedelta(days=options["keep_days"])
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Downsampled {months} months.")
+        )
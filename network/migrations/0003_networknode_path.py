@@ -0,0 +1,58 @@
+# Generated by Django 4.2.23 on 2026-10-18 00:09
+
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    """Compute materialized paths and levels for existing nodes."""
+    NetworkNode = apps.get_model("network", "NetworkNode")
+    suppliers = dict(NetworkNode.objects.values_list("id", "supplier_id"))
+    paths = {}
+
+    def resolve(pk):
+        chain = []
+        current = pk
+        while (current is not None and current not in paths
+               and current not in chain):
+            chain.append(current)
+            current = suppliers.get(current)
+        if current in paths:
+            prefix = f"{paths[current]}{current}/"
+        else:
+            # Root reached, or a cycle in legacy data broken at this node
+            prefix = "/"
+        for node_pk in reversed(chain):
+            paths[node_pk] = prefix
+            prefix = f"{prefix}{node_pk}/"
+        return paths[pk]
+
+    nodes = list(NetworkNode.objects.only("id", "path", "level"))
+    for node in nodes:
+        node.path = resolve(node.id)
+        node.level = node.path.count("/") - 1
+    NetworkNode.objects.bulk_update(nodes, ["path", "level"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("network",
+         "0002_alter_networknode_options_alter_product_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="networknode",
+            name="path",
+            field=models.CharField(default="/", editable=False,
+                                   max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name="networknode",
+            index=models.Index(
+                fields=["path"],
+                name="network_net_path_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
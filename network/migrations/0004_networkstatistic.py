@@ -0,0 +1,90 @@
+# Generated by Django 4.2.23 on 2026-10-18 00:12
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_statistics(apps, schema_editor):
+    """Build the statistics rollups from the existing nodes."""
+    NetworkNode = apps.get_model("network", "NetworkNode")
+    NetworkStatistic = apps.get_model("network", "NetworkStatistic")
+    totals = NetworkNode.objects.aggregate(count=Count("id"), debt=Sum("debt"))
+    rows = [
+        NetworkStatistic(
+            dimension="total",
+            key="",
+            node_count=totals["count"],
+            total_debt=totals["debt"] or 0,
+        )
+    ]
+    for dimension in ("level", "country"):
+        grouped = NetworkNode.objects.values(dimension).annotate(
+            count=Count("id"), debt=Sum("debt")
+        )
+        rows.extend(
+            NetworkStatistic(
+                dimension=dimension,
+                key=str(row[dimension]),
+                node_count=row["count"],
+                total_debt=row["debt"] or 0,
+            )
+            for row in grouped
+        )
+    NetworkStatistic.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("network", "0003_networknode_path"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NetworkStatistic",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "dimension",
+                    models.CharField(
+                        choices=[
+                            ("total", "Total"),
+                            ("level", "Level"),
+                            ("country", "Country"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "key",
+                    models.CharField(blank=True, default="", max_length=100),
+                ),
+                ("node_count", models.BigIntegerField(default=0)),
+                (
+                    "total_debt",
+                    models.DecimalField(
+                        decimal_places=2, default=0, max_digits=20
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Network Statistic",
+                "verbose_name_plural": "Network Statistics",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="networkstatistic",
+            constraint=models.UniqueConstraint(
+                fields=("dimension", "key"),
+                name="network_statistic_dimension_key_uniq",
+            ),
+        ),
+        migrations.RunPython(fill_statistics, migrations.RunPython.noop),
+    ]
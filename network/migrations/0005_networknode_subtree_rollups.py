@@ -0,0 +1,51 @@
+# Generated by Django 4.2.23 on 2026-10-18 00:14
+
+from django.db import migrations, models
+
+
+def fill_subtree_rollups(apps, schema_editor):
+    """Sum debt and node counts of every subtree along the paths."""
+    NetworkNode = apps.get_model("network", "NetworkNode")
+    nodes = {
+        node.pk: node for node in NetworkNode.objects.only("path", "debt")
+    }
+    for node in nodes.values():
+        node.subtree_debt = 0
+        node.subtree_count = 0
+    for node in nodes.values():
+        ancestors = [int(pk) for pk in node.path.split("/") if pk]
+        for pk in [*ancestors, node.pk]:
+            if pk in nodes:
+                nodes[pk].subtree_debt += node.debt
+                nodes[pk].subtree_count += 1
+    NetworkNode.objects.bulk_update(
+        nodes.values(), ["subtree_debt", "subtree_count"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("network", "0004_networkstatistic"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="networknode",
+            name="subtree_count",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name="networknode",
+            name="subtree_debt",
+            field=models.DecimalField(
+                decimal_places=2, default=0, editable=False, max_digits=16
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="networknode",
+            index=models.Index(
+                fields=["subtree_debt"], name="network_net_subtree_82780c_idx"
+            ),
+        ),
+        migrations.RunPython(fill_subtree_rollups, migrations.RunPython.noop),
+    ]
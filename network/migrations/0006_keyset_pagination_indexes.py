@@ -0,0 +1,40 @@
+# Generated by Django 4.2.23 on 2026-10-18 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("network", "0005_networknode_subtree_rollups"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="networknode",
+            index=models.Index(
+                fields=["-created_at", "-id"],
+                name="network_net_created_169aad_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["release_date", "id"],
+                name="network_pro_release_574477_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["price", "id"],
+                name="network_pro_price_fd3707_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["name", "id"],
+                name="network_pro_name_e8b3f6_idx",
+            ),
+        ),
+    ]
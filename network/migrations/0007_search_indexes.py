@@ -0,0 +1,58 @@
+# Generated by Django 4.2.23 on 2026-10-18 01:10
+
+from django.db import migrations
+
+SEARCH_FIELDS = {
+    "networknode": ("name", "email"),
+    "product": ("name", "model"),
+}
+
+
+def search_indexes(model_name):
+    """Full-text and trigram GIN indexes of one model's search fields."""
+    from django.contrib.postgres.indexes import GinIndex
+
+    from network.search import search_vector
+
+    fields = SEARCH_FIELDS[model_name]
+    indexes = [
+        GinIndex(search_vector(*fields), name=f"network_{model_name}_fts")
+    ]
+    for field in fields:
+        indexes.append(
+            GinIndex(
+                fields=[field],
+                opclasses=["gin_trgm_ops"],
+                name=f"network_{model_name}_{field}_trgm",
+            )
+        )
+    return indexes
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for model_name in SEARCH_FIELDS:
+        model = apps.get_model("network", model_name)
+        for index in search_indexes(model_name):
+            schema_editor.add_index(model, index)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for model_name in SEARCH_FIELDS:
+        model = apps.get_model("network", model_name)
+        for index in search_indexes(model_name):
+            schema_editor.remove_index(model, index)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("network", "0006_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.23 on 2026-10-18 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("network", "0007_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="networknode",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
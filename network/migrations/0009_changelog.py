@@ -0,0 +1,55 @@
+# Generated by Django 4.2.23 on 2026-10-18 02:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("network", "0008_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeLog",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "entity",
+                    models.CharField(
+                        choices=[
+                            ("node", "Network Node"),
+                            ("product", "Product"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("created", "Created"),
+                            ("updated", "Updated"),
+                            ("deleted", "Deleted"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "changed_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "verbose_name": "Change Log Entry",
+                "verbose_name_plural": "Change Log",
+                "indexes": [
+                    models.Index(
+                        fields=["entity", "id"],
+                        name="network_cha_entity_75ed47_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.23 on 2026-10-18 00:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def open_balances(apps, schema_editor):
+    """Record the current debt of every node as its opening entry."""
+    NetworkNode = apps.get_model("network", "NetworkNode")
+    DebtLedgerEntry = apps.get_model("network", "DebtLedgerEntry")
+    nodes = NetworkNode.objects.exclude(debt=0).values_list("pk", "debt")
+    DebtLedgerEntry.objects.bulk_create(
+        (
+            DebtLedgerEntry(node_id=pk, amount=debt, kind="adjustment")
+            for pk, debt in nodes.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("network", "0009_changelog"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DebtLedgerEntry",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, max_digits=12),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("adjustment", "Adjustment"),
+                            ("charge", "Charge"),
+                            ("payment", "Payment"),
+                            ("cleared", "Cleared"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "node",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="debt_entries",
+                        to="network.networknode",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Debt Ledger Entry",
+                "verbose_name_plural": "Debt Ledger",
+                "indexes": [
+                    models.Index(
+                        fields=["node", "id"],
+                        name="network_deb_node_id_a62f37_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(open_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.23 on 2026-10-18 00:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("network", "0010_debt_ledger"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DebtSnapshot",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("day", "Day"), ("month", "Month")],
+                        max_length=10,
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("debt", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("country", models.CharField(max_length=100)),
+                (
+                    "node_type",
+                    models.CharField(
+                        choices=[
+                            ("factory", "Factory"),
+                            ("retail", "Retail Network"),
+                            ("entrepreneur", "Individual Entrepreneur"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("level", models.IntegerField()),
+                (
+                    "node",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="debt_snapshots",
+                        to="network.networknode",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Debt Snapshot",
+                "verbose_name_plural": "Debt Snapshots",
+                "indexes": [
+                    models.Index(
+                        fields=["period", "date"],
+                        name="network_deb_period_569564_idx",
+                    ),
+                    models.Index(
+                        fields=["period", "country", "date"],
+                        name="network_deb_period_835f02_idx",
+                    ),
+                    models.Index(
+                        fields=["period", "node_type", "date"],
+                        name="network_deb_period_15010b_idx",
+                    ),
+                    models.Index(
+                        fields=["period", "level", "date"],
+                        name="network_deb_period_bff635_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="debtsnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("node", "period", "date"),
+                name="network_debtsnapshot_node_period_date_uniq",
+            ),
+        ),
+    ]
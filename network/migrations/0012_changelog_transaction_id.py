@@ -0,0 +1,35 @@
+# Generated by Django 4.2.23 on 2026-10-18 01:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("network", "0011_debt_snapshots"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="changelog",
+            name="network_cha_entity_75ed47_idx",
+        ),
+        migrations.AddField(
+            model_name="changelog",
+            name="transaction_id",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="changelog",
+            index=models.Index(
+                fields=["transaction_id", "id"],
+                name="network_cha_transac_0f0a8c_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="changelog",
+            index=models.Index(
+                fields=["entity", "transaction_id", "id"],
+                name="network_cha_entity_c48570_idx",
+            ),
+        ),
+    ]
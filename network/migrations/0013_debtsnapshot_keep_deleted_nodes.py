@@ -0,0 +1,23 @@
+# Generated by Django 4.2.23 on 2026-10-18 01:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("network", "0012_changelog_transaction_id"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="debtsnapshot",
+            name="node",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="debt_snapshots",
+                to="network.networknode",
+            ),
+        ),
+    ]
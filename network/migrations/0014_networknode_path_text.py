@@ -0,0 +1,29 @@
+# Generated by Django 4.2.23 on 2026-10-18 01:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("network", "0013_debtsnapshot_keep_deleted_nodes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="networknode",
+            name="network_net_path_idx",
+        ),
+        migrations.AlterField(
+            model_name="networknode",
+            name="path",
+            field=models.TextField(default="/", editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="networknode",
+            index=models.Index(
+                fields=["path"],
+                name="network_net_path_idx",
+                opclasses=["text_pattern_ops"],
+            ),
+        ),
+    ]
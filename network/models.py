@@ -1,6 +1,23 @@
 # network/models.py
-from django.db import models
+from django.db import connections, models, transaction
+from decimal import Decimal
+from itertools import islice
+
+from django.db.models import (
+    Case, Count, F, Max, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Concat, Substr, TruncMonth
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .cache import bump_generation_on_commit
+
+PATH_SEPARATOR = "/"
+# Поля узла, которые читаются под блокировкой перед изменением агрегатов
+LOCKED_FIELDS = (
+    "path", "level", "country", "debt", "subtree_debt", "subtree_count",
+)
 
 
 class NetworkNode(models.Model):
@@ -17,7 +34,11 @@ class NetworkNode(models.Model):
         debt (Decimal): Задолженность перед поставщиком.
         node_type (str): Тип узла (factory/retail/entrepreneur).
         created_at (datetime): Дата создания узла.
+        updated_at (datetime): Дата последнего изменения узла.
         level (int): Уровень в иерархии.
+        path (str): Материализованный путь из id предков ("/1/5/").
+        subtree_debt (Decimal): Задолженность узла и всех его клиентов.
+        subtree_count (int): Количество узлов в поддереве, включая узел.
     """
 
     NODE_TYPES = [
@@ -38,8 +59,14 @@ class NetworkNode(models.Model):
     )
     debt = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     node_type = models.CharField(max_length=20, choices=NODE_TYPES)
     level = models.IntegerField(default=0, editable=False)
+    path = models.TextField(default=PATH_SEPARATOR, editable=False)
+    subtree_debt = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0, editable=False
+    )
+    subtree_count = models.PositiveIntegerField(default=1, editable=False)
 
     class Meta:
         verbose_name = "Network Node"
@@ -47,43 +74,744 @@ class NetworkNode(models.Model):
         indexes = [
             models.Index(fields=["city"]),
             models.Index(fields=["country"]),
+            models.Index(
+                fields=["path"],
+                name="network_net_path_idx",
+                opclasses=["text_pattern_ops"],
+            ),
+            models.Index(fields=["subtree_debt"]),
+            models.Index(fields=["-created_at", "-id"]),
         ]
         ordering = ["-created_at"]
 
     def clean(self):
         """Валидация модели."""
         if self.pk and self.supplier:
-            # Проверка на циклическую ссылку
-            current = self.supplier
-            while current:
-                if current.pk == self.pk:
-                    raise ValidationError("Circular reference detected.")
-                current = current.supplier
+            # Проверка на циклическую ссылку по пути поставщика
+            if (self.supplier.pk == self.pk
+                    or self.pk in self.supplier.get_ancestor_ids()):
+                raise ValidationError("Circular reference detected.")
 
         # Завод не может иметь поставщика
         if self.node_type == "factory" and self.supplier:
             raise ValidationError("A factory cannot have a supplier.")
 
     def save(self, *args, **kwargs):
-        """Сохранение с автоматическим расчетом уровня иерархии."""
+        """Сохранение с автоматическим расчетом уровня иерархии.
+
+        При смене поставщика путь и уровень всего поддерева клиентов
+        пересчитываются одним UPDATE в той же транзакции, а агрегаты
+        поддеревьев предков изменяются только вдоль старого и нового пути.
+        Узел, его старые и новые предки и переносимое поддерево
+        блокируются заранее в порядке pk, а путь и проверка циклов
+        повторяются по заблокированной строке поставщика: объект
+        поставщика в памяти мог устареть.
+        """
         self.clean()
-        self.level = self.get_hierarchy_level()
-        super().save(*args, **kwargs)
+        self.path = self.build_path()
+        self.debt = Decimal(str(self.debt or 0))
+        with transaction.atomic():
+            moved = []
+            if self.pk:
+                old_path = (
+                    NetworkNode.objects.filter(pk=self.pk)
+                    .values_list("path", flat=True).first()
+                )
+                if old_path is not None and old_path != self.path:
+                    moved = [self.pk]
+            while True:
+                locked = NetworkNode._lock_nodes(
+                    [pk for pk in (self.pk, self.supplier_id) if pk],
+                    descendants_of=moved,
+                )
+                self.path = self._locked_path(locked)
+                previous = None
+                if self.pk in locked:
+                    previous = {
+                        field: getattr(locked[self.pk], field)
+                        for field in LOCKED_FIELDS
+                    }
+                if (moved or previous is None
+                        or previous["path"] == self.path):
+                    break
+                # Узел перенесли между чтением пути и блокировкой
+                moved = [self.pk]
+            self.level = self.get_hierarchy_level()
+            subtree_deltas = {}
+            if previous is None:
+                self.subtree_debt = self.debt
+                self.subtree_count = 1
+            else:
+                self.subtree_debt = (
+                    previous["subtree_debt"] + self.debt - previous["debt"]
+                )
+                self.subtree_count = previous["subtree_count"]
+                for pk in self._ids_from_path(previous["path"]):
+                    subtree_deltas[pk] = (
+                        -previous["subtree_debt"], -previous["subtree_count"]
+                    )
+            super().save(*args, **kwargs)
 
-        # Обновление уровня для всех клиентов
-        for client in self.clients.all():
-            client.save()
+            for pk in self.get_ancestor_ids():
+                debt, count = subtree_deltas.get(pk, (0, 0))
+                subtree_deltas[pk] = (
+                    debt + self.subtree_debt, count + self.subtree_count
+                )
+            NetworkNode.apply_subtree_deltas(subtree_deltas)
 
-    def get_hierarchy_level(self):
-        """Рекурсивно вычисляет уровень в иерархии."""
+            deltas = NetworkStatistic.node_deltas(
+                self.level, self.country, self.debt
+            )
+            if previous is not None:
+                NetworkStatistic.merge(deltas, NetworkStatistic.node_deltas(
+                    previous["level"], previous["country"],
+                    previous["debt"], sign=-1,
+                ))
+            NetworkStatistic.apply(deltas)
+
+            debt_change = self.debt - (
+                previous["debt"] if previous is not None else 0
+            )
+            if debt_change:
+                DebtLedgerEntry.objects.create(
+                    node=self, amount=debt_change,
+                    kind=DebtLedgerEntry.ADJUSTMENT,
+                )
+
+            # Обновление уровня для всех клиентов
+            if previous is not None and previous["path"] != self.path:
+                self._rebase_descendants(
+                    f"{previous['path']}{self.pk}{PATH_SEPARATOR}",
+                    self.get_descendants_path(),
+                )
+
+    def _locked_path(self, locked):
+        """Строит путь по заблокированной строке поставщика."""
+        if not self.supplier_id:
+            return PATH_SEPARATOR
+        supplier = locked.get(self.supplier_id)
+        if supplier is None:
+            raise ValidationError("Supplier does not exist.")
+        if NetworkNode.supplier.is_cached(self):
+            self.supplier.path = supplier.path
+        path = f"{supplier.path}{self.supplier_id}{PATH_SEPARATOR}"
+        if self.pk and self.pk in self._ids_from_path(path):
+            raise ValidationError("Circular reference detected.")
+        return path
+
+    def build_path(self):
+        """Строит материализованный путь по пути поставщика."""
         if not self.supplier:
-            return 0
-        return self.supplier.get_hierarchy_level() + 1
+            return PATH_SEPARATOR
+        return f"{self.supplier.path}{self.supplier.pk}{PATH_SEPARATOR}"
+
+    def get_hierarchy_level(self):
+        """Вычисляет уровень в иерархии по материализованному пути."""
+        return self.path.count(PATH_SEPARATOR) - 1
+
+    def get_ancestor_ids(self):
+        """Возвращает id предков от корня к ближайшему поставщику."""
+        return self._ids_from_path(self.path)
+
+    @staticmethod
+    def _ids_from_path(path):
+        return [int(pk) for pk in path.split(PATH_SEPARATOR) if pk]
+
+    def get_descendants_path(self):
+        """Префикс пути, общий для всех потомков узла."""
+        return f"{self.path}{self.pk}{PATH_SEPARATOR}"
+
+    def get_ancestors(self):
+        """Все предки узла одним запросом, от корня вниз."""
+        return NetworkNode.objects.filter(
+            pk__in=self.get_ancestor_ids()
+        ).order_by("level")
+
+    def get_descendants(self):
+        """Все потомки узла одним запросом по индексу пути."""
+        return NetworkNode.objects.filter(
+            path__startswith=self.get_descendants_path()
+        )
+
+    def get_subtree(self, depth=None):
+        """Узел вместе с потомками не глубже ``depth`` уровней."""
+        subtree = NetworkNode.objects.filter(
+            models.Q(pk=self.pk)
+            | models.Q(path__startswith=self.get_descendants_path())
+        )
+        if depth is not None:
+            subtree = subtree.filter(level__lte=self.level + depth)
+        return subtree
+
+    def detach_descendants(self):
+        """Отсоединяет удаляемый узел от иерархии.
+
+        Клиенты узла становятся корнями своих поддеревьев, а поддерево
+        узла вычитается из агрегатов его предков. Вызывается в транзакции
+        удаления.
+        """
+        current = NetworkNode._lock_nodes(
+            [self.pk], descendants_of=[self.pk]
+        ).get(self.pk)
+        if current is not None:
+            for field in LOCKED_FIELDS:
+                setattr(self, field, getattr(current, field))
+        NetworkNode.apply_subtree_deltas({
+            pk: (-self.subtree_debt, -self.subtree_count)
+            for pk in self.get_ancestor_ids()
+        })
+        self._rebase_descendants(self.get_descendants_path(), PATH_SEPARATOR)
+
+    @classmethod
+    def debt_change_deltas(cls, rows):
+        """Изменения агрегатов поддеревьев от изменений задолженности.
+
+        Args:
+            rows: Пары (узел, изменение задолженности) с загруженным путем.
+
+        Returns:
+            dict: Изменения (задолженность, количество) по id узлов.
+        """
+        deltas = {}
+        for node, debt in rows:
+            for pk in [*node.get_ancestor_ids(), node.pk]:
+                current, _ = deltas.get(pk, (0, 0))
+                deltas[pk] = (current + debt, 0)
+        return deltas
+
+    @classmethod
+    def change_debts(cls, amounts, kind, batch_size=500):
+        """Атомарно прибавляет суммы к задолженности узлов.
+
+        Задолженность изменяется выражением F() без чтения текущего
+        значения, поэтому параллельные изменения задолженности одного
+        поставщика не теряются. Каждое изменение записывается в журнал.
+
+        Args:
+            amounts: Суммы изменения задолженности по id узлов.
+            kind: Вид операции из ``DebtLedgerEntry.KINDS``.
+            batch_size: Количество узлов в одном UPDATE.
+
+        Returns:
+            int: Количество узлов с измененной задолженностью.
+        """
+        amounts = {
+            pk: Decimal(str(amount))
+            for pk, amount in amounts.items() if amount
+        }
+        with transaction.atomic():
+            locked = cls._lock_nodes(amounts)
+            rows = [
+                (locked[pk], amounts[pk])
+                for pk in sorted(amounts) if pk in locked
+            ]
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                cls.objects.filter(
+                    pk__in=[node.pk for node, _ in batch]
+                ).update(
+                    debt=F("debt") + Case(
+                        *[When(pk=node.pk, then=Value(amount))
+                          for node, amount in batch],
+                        default=Value(Decimal(0)),
+                        output_field=models.DecimalField(
+                            max_digits=12, decimal_places=2
+                        ),
+                    ),
+                    updated_at=timezone.now(),
+                )
+            cls._record_debt_changes(rows, kind)
+        return len(rows)
+
+    @classmethod
+    def clear_debts(cls, queryset, batch_size=500):
+        """Обнуляет задолженность узлов одним UPDATE на пачку.
+
+        ``save()`` не вызывается: путь и уровень узлов не меняются, поэтому
+        валидация и пересчет иерархии не нужны. Строки заблокированы до
+        конца транзакции, и в журнал и агрегаты попадают ровно списанные
+        суммы; узлы, задолженность которых уже обнулили, пропускаются.
+
+        Args:
+            queryset: Узлы, задолженность которых списывается.
+            batch_size: Количество узлов в одном UPDATE.
+
+        Returns:
+            int: Количество узлов, у которых была задолженность.
+        """
+        with transaction.atomic():
+            pks = list(queryset.exclude(debt=0).values_list("pk", flat=True))
+            locked = cls._lock_nodes(pks)
+            nodes = [
+                locked[pk] for pk in sorted(pks)
+                if pk in locked and locked[pk].debt
+            ]
+            for start in range(0, len(nodes), batch_size):
+                batch = nodes[start:start + batch_size]
+                cls.objects.filter(
+                    pk__in=[node.pk for node in batch]
+                ).update(debt=0, updated_at=timezone.now())
+            cls._record_debt_changes(
+                [(node, -node.debt) for node in nodes],
+                DebtLedgerEntry.CLEARED,
+            )
+        return len(nodes)
+
+    @classmethod
+    def _lock_nodes(cls, pks, descendants_of=()):
+        """Блокирует узлы вместе с предками до конца транзакции.
+
+        Записи узла изменяют агрегаты всех его предков, поэтому узлы,
+        предки и поддеревья узлов ``descendants_of`` блокируются одним
+        запросом в порядке pk до любых UPDATE. Транзакции с общими
+        предками ждут друг друга, а не блокируют друг друга взаимно. Если
+        узел перенесли между чтением пути и блокировкой, запрос
+        повторяется с новыми предками.
+
+        Args:
+            pks: Id изменяемых узлов.
+            descendants_of: Id узлов, поддеревья которых тоже изменяются.
+
+        Returns:
+            dict: Заблокированные узлы по id.
+        """
+        pks = set(pks)
+        paths = dict(
+            cls.objects.filter(pk__in=pks | set(descendants_of))
+            .values_list("pk", "path")
+        )
+        while True:
+            condition = Q(pk__in=pks)
+            for pk, path in paths.items():
+                condition |= Q(pk__in=cls._ids_from_path(path))
+                if pk in descendants_of:
+                    condition |= Q(
+                        path__startswith=f"{path}{pk}{PATH_SEPARATOR}"
+                    )
+            locked = {
+                node.pk: node
+                for node in cls.objects.select_for_update()
+                .filter(condition)
+                .only(*LOCKED_FIELDS)
+                .order_by("pk")
+            }
+            current = {
+                pk: locked[pk].path for pk in paths if pk in locked
+            }
+            if current == paths:
+                return locked
+            paths = current
+
+    @classmethod
+    def _record_debt_changes(cls, rows, kind):
+        """Записывает изменения задолженности в журнал и агрегаты."""
+        DebtLedgerEntry.objects.bulk_create(
+            [DebtLedgerEntry(node_id=node.pk, amount=amount, kind=kind)
+             for node, amount in rows],
+            batch_size=1000,
+        )
+        deltas = {}
+        for node, amount in rows:
+            NetworkStatistic.merge(deltas, NetworkStatistic.node_deltas(
+                node.level, node.country, amount, count=0
+            ))
+        NetworkStatistic.apply(deltas)
+        cls.apply_subtree_deltas(cls.debt_change_deltas(rows))
+        if rows:
+            bump_generation_on_commit(NetworkNode)
+
+    @classmethod
+    def apply_subtree_deltas(cls, deltas, batch_size=500):
+        """Прибавляет изменения к агрегатам поддеревьев узлов.
+
+        Разные изменения для пачки узлов применяются одним UPDATE
+        с выражением CASE.
+
+        Args:
+            deltas: Изменения (задолженность, количество) по id узлов.
+            batch_size: Количество узлов в одном UPDATE.
+        """
+        items = [
+            (pk, debt, count)
+            for pk, (debt, count) in deltas.items()
+            if debt or count
+        ]
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            changes = {}
+            if any(debt for _, debt, _ in batch):
+                changes["subtree_debt"] = F("subtree_debt") + Case(
+                    *[When(pk=pk, then=Value(Decimal(debt)))
+                      for pk, debt, _ in batch],
+                    default=Value(Decimal(0)),
+                    output_field=models.DecimalField(
+                        max_digits=16, decimal_places=2
+                    ),
+                )
+            if any(count for _, _, count in batch):
+                changes["subtree_count"] = F("subtree_count") + Case(
+                    *[When(pk=pk, then=Value(count))
+                      for pk, _, count in batch],
+                    default=Value(0),
+                    output_field=models.IntegerField(),
+                )
+            pks = [pk for pk, _, _ in batch]
+            cls.objects.filter(pk__in=pks).update(
+                updated_at=timezone.now(), **changes
+            )
+            ChangeLog.record(ChangeLog.NODE, ChangeLog.UPDATED, pks)
+
+    def _rebase_descendants(self, old_prefix, new_prefix):
+        """Переносит всё поддерево на новый префикс одним UPDATE."""
+        delta = new_prefix.count(PATH_SEPARATOR) - old_prefix.count(
+            PATH_SEPARATOR
+        )
+        subtree = NetworkNode.objects.filter(path__startswith=old_prefix)
+        ChangeLog.record(
+            ChangeLog.NODE, ChangeLog.UPDATED,
+            subtree.values_list("pk", flat=True),
+        )
+        if delta:
+            NetworkStatistic.apply(
+                NetworkStatistic.level_shift_deltas(subtree, delta)
+            )
+        return subtree.update(
+            path=Concat(
+                Value(new_prefix), Substr("path", len(old_prefix) + 1)
+            ),
+            level=F("level") + delta,
+            updated_at=timezone.now(),
+        )
 
     def __str__(self):
         return self.name
 
 
+class NetworkStatistic(models.Model):
+    """Накопительные агрегаты узлов сети для эндпоинта статистики.
+
+    Строки обновляются атомарными F()-выражениями в транзакции записи
+    узла, поэтому чтение статистики не требует сканирования таблицы узлов.
+
+    Attributes:
+        dimension (str): Разрез агрегата (total/level/country).
+        key (str): Значение разреза (уровень, страна или пустая строка).
+        node_count (int): Количество узлов.
+        total_debt (Decimal): Суммарная задолженность узлов.
+    """
+
+    TOTAL = "total"
+    LEVEL = "level"
+    COUNTRY = "country"
+    DIMENSIONS = [
+        (TOTAL, "Total"),
+        (LEVEL, "Level"),
+        (COUNTRY, "Country"),
+    ]
+
+    dimension = models.CharField(max_length=20, choices=DIMENSIONS)
+    key = models.CharField(max_length=100, blank=True, default="")
+    node_count = models.BigIntegerField(default=0)
+    total_debt = models.DecimalField(
+        max_digits=20, decimal_places=2, default=0
+    )
+
+    class Meta:
+        verbose_name = "Network Statistic"
+        verbose_name_plural = "Network Statistics"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dimension", "key"],
+                name="network_statistic_dimension_key_uniq",
+            ),
+        ]
+
+    @classmethod
+    def node_deltas(cls, level, country, debt, count=1, sign=1):
+        """Изменения агрегатов от появления (или удаления) узлов."""
+        debt = Decimal(str(debt or 0))
+        return {
+            (cls.TOTAL, ""): (sign * count, sign * debt),
+            (cls.LEVEL, str(level)): (sign * count, sign * debt),
+            (cls.COUNTRY, country): (sign * count, sign * debt),
+        }
+
+    @classmethod
+    def level_shift_deltas(cls, queryset, delta):
+        """Изменения агрегатов по уровням при сдвиге поддерева."""
+        deltas = {}
+        rows = queryset.values("level").annotate(
+            count=Count("id"), debt=Sum("debt")
+        )
+        for row in rows:
+            debt = row["debt"] or Decimal(0)
+            cls.merge(deltas, {
+                (cls.LEVEL, str(row["level"])): (-row["count"], -debt),
+                (cls.LEVEL, str(row["level"] + delta)): (row["count"], debt),
+            })
+        return deltas
+
+    @staticmethod
+    def merge(target, deltas):
+        """Складывает изменения ``deltas`` в ``target``."""
+        for key, (count, debt) in deltas.items():
+            current_count, current_debt = target.get(key, (0, 0))
+            target[key] = (current_count + count, current_debt + debt)
+        return target
+
+    @classmethod
+    def apply(cls, deltas):
+        """Применяет изменения агрегатов атомарными UPDATE."""
+        # Строки изменяются в едином порядке, как и строки узлов
+        for (dimension, key), (count, debt) in sorted(deltas.items()):
+            if not count and not debt:
+                continue
+            rows = cls.objects.filter(dimension=dimension, key=key)
+            changes = {
+                "node_count": F("node_count") + count,
+                "total_debt": F("total_debt") + debt,
+            }
+            if not rows.update(**changes):
+                cls.objects.get_or_create(dimension=dimension, key=key)
+                rows.update(**changes)
+
+    @classmethod
+    def live_rows(cls):
+        """Агрегаты, посчитанные по таблице узлов напрямую."""
+        totals = NetworkNode.objects.aggregate(
+            count=Count("id"), debt=Sum("debt")
+        )
+        rows = {
+            (cls.TOTAL, ""): (totals["count"], totals["debt"] or Decimal(0))
+        }
+        for dimension in (cls.LEVEL, cls.COUNTRY):
+            grouped = NetworkNode.objects.values(dimension).annotate(
+                count=Count("id"), debt=Sum("debt")
+            )
+            for row in grouped:
+                rows[(dimension, str(row[dimension]))] = (
+                    row["count"], row["debt"] or Decimal(0)
+                )
+        return rows
+
+    @classmethod
+    def stored_rows(cls):
+        """Сохраненные агрегаты без пустых строк."""
+        return {
+            (row.dimension, row.key): (row.node_count, row.total_debt)
+            for row in cls.objects.all()
+            if row.node_count or row.total_debt
+        }
+
+    @classmethod
+    def rebuild(cls):
+        """Пересчитывает все агрегаты по таблице узлов."""
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                cls(dimension=dimension, key=key,
+                    node_count=count, total_debt=debt)
+                for (dimension, key), (count, debt) in cls.live_rows().items()
+            )
+
+    def __str__(self):
+        return f"{self.dimension}:{self.key}"
+
+
+class DebtLedgerEntry(models.Model):
+    """Запись журнала движения задолженности узла перед поставщиком.
+
+    Записи только добавляются, а задолженность узла изменяется вместе с
+    ними в одной транзакции, поэтому сумма записей узла равна его
+    задолженности.
+
+    Attributes:
+        node (NetworkNode): Узел, задолженность которого изменилась.
+        amount (Decimal): Изменение задолженности, при погашении
+            отрицательное.
+        kind (str): Вид операции (adjustment/charge/payment/cleared).
+        created_at (datetime): Время операции.
+    """
+
+    ADJUSTMENT = "adjustment"
+    CHARGE = "charge"
+    PAYMENT = "payment"
+    CLEARED = "cleared"
+    KINDS = [
+        (ADJUSTMENT, "Adjustment"),
+        (CHARGE, "Charge"),
+        (PAYMENT, "Payment"),
+        (CLEARED, "Cleared"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    node = models.ForeignKey(
+        NetworkNode, on_delete=models.CASCADE, related_name="debt_entries"
+    )
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    kind = models.CharField(max_length=20, choices=KINDS)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Debt Ledger Entry"
+        verbose_name_plural = "Debt Ledger"
+        indexes = [
+            models.Index(fields=["node", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.node_id} {self.kind} {self.amount}"
+
+
+class DebtSnapshot(models.Model):
+    """Снимок задолженности узла на дату для анализа ее динамики.
+
+    Ежедневные снимки всех узлов записываются пакетными INSERT, а по
+    истечении срока хранения заменяются последним снимком месяца. Страна,
+    тип и уровень узла копируются в снимок, чтобы выборки по ним читали
+    диапазон индекса без соединения с таблицей узлов. Снимки удаленных
+    узлов сохраняются с их id.
+
+    Attributes:
+        node (NetworkNode): Узел сети (может быть уже удален).
+        period (str): Детализация снимка (day/month).
+        date (date): Дата снимка, для месячных — первое число месяца.
+        debt (Decimal): Задолженность узла на дату снимка.
+        country (str): Страна узла на дату снимка.
+        node_type (str): Тип узла на дату снимка.
+        level (int): Уровень узла в иерархии на дату снимка.
+    """
+
+    DAY = "day"
+    MONTH = "month"
+    PERIODS = [
+        (DAY, "Day"),
+        (MONTH, "Month"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    # Снимки переживают удаление узла: история задолженности не меняется
+    node = models.ForeignKey(
+        NetworkNode,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="debt_snapshots",
+    )
+    period = models.CharField(max_length=10, choices=PERIODS)
+    date = models.DateField()
+    debt = models.DecimalField(max_digits=12, decimal_places=2)
+    country = models.CharField(max_length=100)
+    node_type = models.CharField(
+        max_length=20, choices=NetworkNode.NODE_TYPES
+    )
+    level = models.IntegerField()
+
+    class Meta:
+        verbose_name = "Debt Snapshot"
+        verbose_name_plural = "Debt Snapshots"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["node", "period", "date"],
+                name="network_debtsnapshot_node_period_date_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["period", "date"]),
+            models.Index(fields=["period", "country", "date"]),
+            models.Index(fields=["period", "node_type", "date"]),
+            models.Index(fields=["period", "level", "date"]),
+        ]
+
+    @classmethod
+    def take(cls, date, batch_size=5000):
+        """Записывает ежедневный снимок задолженности всех узлов.
+
+        Повторный снимок на ту же дату заменяет предыдущий.
+
+        Args:
+            date: Дата снимка.
+            batch_size: Количество строк в одном INSERT.
+
+        Returns:
+            int: Количество записанных снимков.
+        """
+        nodes = NetworkNode.objects.order_by().values_list(
+            "pk", "debt", "country", "node_type", "level"
+        ).iterator(chunk_size=batch_size)
+        created = 0
+        with transaction.atomic():
+            cls.objects.filter(period=cls.DAY, date=date).delete()
+            while True:
+                batch = [
+                    cls(node_id=pk, period=cls.DAY, date=date, debt=debt,
+                        country=country, node_type=node_type, level=level)
+                    for pk, debt, country, node_type, level
+                    in islice(nodes, batch_size)
+                ]
+                if not batch:
+                    break
+                cls.objects.bulk_create(batch)
+                created += len(batch)
+        return created
+
+    @classmethod
+    def downsample(cls, before):
+        """Прореживает ежедневные снимки месяцев, закончившихся до даты.
+
+        Последний ежедневный снимок месяца становится месячным одним
+        UPDATE, остальные снимки месяца удаляются одним DELETE.
+
+        Args:
+            before: Ежедневные снимки месяцев до месяца этой даты
+                заменяются месячными.
+
+        Returns:
+            int: Количество прореженных месяцев.
+        """
+        months = (
+            cls.objects.filter(
+                period=cls.DAY, date__lt=before.replace(day=1)
+            )
+            .annotate(month=TruncMonth("date"))
+            .values("month")
+            .annotate(last=Max("date"))
+            .order_by("month")
+        )
+        count = 0
+        for row in months:
+            with transaction.atomic():
+                month = row["month"]
+                cls.objects.filter(period=cls.MONTH, date=month).delete()
+                cls.objects.filter(period=cls.DAY, date=row["last"]).update(
+                    period=cls.MONTH, date=month
+                )
+                cls.objects.filter(
+                    period=cls.DAY,
+                    date__gte=month,
+                    date__lte=row["last"],
+                ).delete()
+            count += 1
+        return count
+
+    @classmethod
+    def month_ends(cls):
+        """Месячные снимки и последние снимки еще не прореженных месяцев."""
+        last_days = (
+            cls.objects.filter(period=cls.DAY)
+            .annotate(month=TruncMonth("date"))
+            .values("month")
+            .annotate(last=Max("date"))
+            .values("last")
+        )
+        return cls.objects.filter(
+            Q(period=cls.MONTH)
+            | Q(period=cls.DAY, date__in=Subquery(last_days))
+        )
+
+    def __str__(self):
+        return f"{self.node_id} {self.period} {self.date}"
+
+
 class Product(models.Model):
     """Модель продукта, связанного с узлами сети.
 
@@ -94,6 +822,7 @@ class Product(models.Model):
         price (Decimal): Цена продукта.
         quantity (int): Количество на складе.
         nodes (ManyToManyField): Узлы сети, где доступен продукт.
+        updated_at (datetime): Дата последнего изменения продукта.
     """
 
     name = models.CharField(max_length=255)
@@ -102,6 +831,7 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     quantity = models.PositiveIntegerField(default=0)
     nodes = models.ManyToManyField(NetworkNode, related_name="products")
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Product"
@@ -109,7 +839,109 @@ class Product(models.Model):
         indexes = [
             models.Index(fields=["name"]),
             models.Index(fields=["model"]),
+            # Ключи курсорной пагинации: поле сортировки + id
+            models.Index(fields=["release_date", "id"]),
+            models.Index(fields=["price", "id"]),
+            models.Index(fields=["name", "id"]),
         ]
 
     def __str__(self):
         return f"{self.name} - {self.model}"
+
+
+class ChangeLog(models.Model):
+    """Журнал изменений узлов и товаров для инкрементальной синхронизации.
+
+    Записи только добавляются в той же транзакции, что и изменение.
+    Транзакции фиксируются не в порядке id, поэтому лента упорядочена по
+    паре (transaction_id, id) и на PostgreSQL отдает только записи
+    транзакций старше горизонта фиксации — xmin текущего снимка. Более
+    поздние записи получат больший transaction_id и не будут пропущены
+    курсором. Другие базы (SQLite) сериализуют пишущие транзакции, и там
+    transaction_id равен 0. Удаления записываются как tombstone, изменения
+    привязки товаров к узлам — как изменения товаров.
+
+    Attributes:
+        entity (str): Тип объекта (node/product).
+        object_id (int): Id измененного объекта.
+        action (str): Действие (created/updated/deleted).
+        changed_at (datetime): Время изменения.
+        transaction_id (int): Id транзакции базы, добавившей запись.
+    """
+
+    NODE = "node"
+    PRODUCT = "product"
+    ENTITIES = [
+        (NODE, "Network Node"),
+        (PRODUCT, "Product"),
+    ]
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    ACTIONS = [
+        (CREATED, "Created"),
+        (UPDATED, "Updated"),
+        (DELETED, "Deleted"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    entity = models.CharField(max_length=20, choices=ENTITIES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=20, choices=ACTIONS)
+    changed_at = models.DateTimeField(default=timezone.now)
+    transaction_id = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        verbose_name = "Change Log Entry"
+        verbose_name_plural = "Change Log"
+        indexes = [
+            models.Index(fields=["transaction_id", "id"]),
+            models.Index(fields=["entity", "transaction_id", "id"]),
+        ]
+
+    @classmethod
+    def current_transaction(cls, using="default"):
+        """Возвращает выражение id текущей транзакции для новых записей."""
+        if connections[using].vendor == "postgresql":
+            return RawSQL("txid_current()", [])
+        return 0
+
+    @classmethod
+    def commit_horizon(cls, using="default"):
+        """
+        Возвращает id самой старой незавершенной транзакции.
+
+        Все транзакции с меньшим id уже зафиксированы или отменены.
+        ``None`` означает, что видимые записи окончательны.
+        """
+        if connections[using].vendor == "postgresql":
+            return RawSQL(
+                "txid_snapshot_xmin(txid_current_snapshot())", []
+            )
+        return None
+
+    @classmethod
+    def committed(cls, using="default"):
+        """Возвращает записи, перед которыми не появятся новые."""
+        entries = cls.objects.using(using)
+        horizon = cls.commit_horizon(using)
+        if horizon is not None:
+            entries = entries.filter(transaction_id__lt=horizon)
+        return entries
+
+    @classmethod
+    def record(cls, entity, action, object_ids, batch_size=1000):
+        """Добавляет записи об изменении объектов одним INSERT на пачку."""
+        now = timezone.now()
+        transaction_id = cls.current_transaction()
+        cls.objects.bulk_create(
+            (
+                cls(entity=entity, object_id=pk, action=action,
+                    changed_at=now, transaction_id=transaction_id)
+                for pk in object_ids
+            ),
+            batch_size=batch_size,
+        )
+
+    def __str__(self):
+        return f"{self.id} {self.action} {self.entity}:{self.object_id}"
@@ -1,5 +1,22 @@
-# network/pagination.py
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+import operator
+from collections import OrderedDict
+from functools import reduce
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import (
+    EmptyPage, Page, PageNotAnInteger, Paginator,
+)
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -11,3 +28,328 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+def estimate_count(queryset):
+    """
+    Return the PostgreSQL planner's row estimate for ``queryset``.
+
+    Unfiltered querysets read the table statistics from ``pg_class``,
+    filtered ones the top plan node of ``EXPLAIN``. Returns ``None`` when
+    no estimate is available, e.g. on other database backends or for
+    tables that were never analyzed.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    queryset = queryset.order_by()
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class "
+                "WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            estimate = row[0] if row else None
+        else:
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = plan[0]["Plan"]["Plan Rows"]
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+class EstimatedPage(Page):
+    """A page that knows whether another page follows it."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that trusts the planner's estimate for large result sets.
+
+    Below ``exact_count_threshold`` estimated rows the exact ``COUNT(*)``
+    is cheap and is executed as usual. With an estimated count, page
+    numbers are not checked against it: each page reads one extra row to
+    know whether a next page exists, and only an empty page is rejected.
+    """
+
+    exact_count_threshold = 10000
+    count_is_approximate = False
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < self.exact_count_threshold:
+            return super().count
+        self.count_is_approximate = True
+        return estimate
+
+    def validate_number(self, number):
+        # Evaluating the count decides whether it is approximate
+        if not (self.count and self.count_is_approximate):
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_("That page number is not an integer"))
+        if number < 1:
+            raise EmptyPage(_("That page number is less than 1"))
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_approximate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_("That page contains no results"))
+        return EstimatedPage(
+            rows[:self.per_page], number, self,
+            has_next=len(rows) > self.per_page,
+        )
+
+
+class EstimatedCountPagination(StandardResultsSetPagination):
+    """
+    Opt-in page number pagination without an exact COUNT(*) on large lists.
+
+    Use it as ``pagination_class`` of views over tables with millions of
+    rows. The response carries ``count_is_approximate`` so clients can
+    render the total as an estimate.
+    """
+
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("count", self.page.paginator.count),
+            ("count_is_approximate",
+             self.page.paginator.count_is_approximate),
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_is_approximate"] = {
+            "type": "boolean",
+            "example": False,
+        }
+        return response_schema
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over the queryset ordering.
+
+    The cursor stores the ordering values of the last row of a page and the
+    next page is selected with a row comparison on them, so every page costs
+    the same as the first one and no COUNT(*) is executed. The primary key
+    is appended to the ordering as a tiebreaker, which keeps the position
+    unique for non-unique ordering fields such as dates and prices.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering = ("-id",)
+    invalid_cursor_message = _("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.keyset = self.get_ordering(queryset)
+        self.fields = [
+            self._get_field(queryset, name.lstrip("-"))
+            for name in self.keyset
+        ]
+        position, self.reverse = self.decode_cursor(request)
+
+        ordering = self.keyset
+        if self.reverse:
+            ordering = [self._flip(name) for name in ordering]
+        queryset = self._load_keyset(queryset).order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {
+                    "type": "string", "nullable": True, "format": "uri"
+                },
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """Return the queryset ordering with a primary key tiebreaker."""
+        model = queryset.model
+        ordering = [
+            {"pk": "id", "-pk": "-id"}.get(name, name)
+            for name in (queryset.query.order_by or model._meta.ordering)
+            if isinstance(name, str)
+        ]
+        if not all(self._is_orderable(queryset, name) for name in ordering):
+            ordering = []
+        ordering = ordering or list(self.ordering)
+        if not {"id", "-id"} & set(ordering):
+            ordering.append("-id" if ordering[-1].startswith("-") else "id")
+        return ordering
+
+    def seek_filter(self, ordering, position):
+        """Select rows strictly after ``position`` in ``ordering``."""
+        conditions = []
+        equal = Q()
+        for name, value in zip(ordering, position):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            conditions.append(equal & Q(**{f"{field}__{lookup}": value}))
+            equal &= Q(**{field: value})
+        return reduce(operator.or_, conditions)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse):
+        if isinstance(instance, dict):
+            instance = SimpleNamespace(**instance)
+        position = [
+            str(getattr(instance, name.lstrip("-")))
+            if not hasattr(field, "model") else field.value_to_string(instance)
+            for name, field in zip(self.keyset, self.fields)
+        ]
+        payload = json.dumps({"p": position, "r": int(reverse)})
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor
+        )
+
+    def decode_cursor(self, request):
+        """Return the ``(position, reverse)`` pair of the request cursor."""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            position = [
+                field.to_python(value)
+                for field, value in zip(self.fields, payload["p"])
+            ]
+            if len(position) != len(self.fields):
+                raise ValueError
+            return position, bool(payload["r"])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _flip(name):
+        return name[1:] if name.startswith("-") else f"-{name}"
+
+    def _load_keyset(self, queryset):
+        """
+        Keep keyset columns loaded when the queryset uses ``only()`` or
+        selects ``values()`` rows.
+        """
+        if queryset._fields is not None:
+            missing = [
+                name.lstrip("-") for name in self.keyset
+                if name.lstrip("-") not in queryset._fields
+            ]
+            return queryset.values(*queryset._fields, *missing)
+        loaded, defer = queryset.query.deferred_loading
+        if not loaded or defer:
+            return queryset
+        columns = [
+            name.lstrip("-")
+            for name, field in zip(self.keyset, self.fields)
+            if hasattr(field, "model")
+        ]
+        return queryset.only(*loaded, *columns)
+
+    @staticmethod
+    def _get_field(queryset, name):
+        """Return the model field or the output field of an annotation."""
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    @staticmethod
+    def _is_orderable(queryset, name):
+        """Only non-null local columns and annotations can form a keyset."""
+        name = name.lstrip("-")
+        if name in queryset.query.annotation_select:
+            return True
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        return field.concrete and not field.null and not field.is_relation
+
+
+class NetworkNodeCursorPagination(KeysetPagination):
+    """Keyset pagination of nodes, newest first by default."""
+
+    ordering = ("-created_at", "-id")
+
+
+class ProductCursorPagination(KeysetPagination):
+    """Keyset pagination of products, latest releases first by default."""
+
+    ordering = ("-release_date", "-id")
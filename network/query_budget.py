@@ -0,0 +1,99 @@
+"""
+Per-endpoint query budgets.
+
+Viewsets declare how many database queries each action may run, either in
+a ``query_budgets`` mapping or with the ``query_budget`` decorator on an
+action method. ``QueryBudgetMiddleware`` counts the queries of every
+request and logs, or raises when ``NETWORK_QUERY_BUDGET_RAISE`` is on,
+once an action exceeds its budget.
+"""
+
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a request runs more queries than its action allows."""
+
+
+def query_budget(max_queries):
+    """Declare the maximum number of queries of a viewset action."""
+
+    def decorator(func):
+        func.query_budget = max_queries
+        return func
+
+    return decorator
+
+
+def get_query_budget(viewset_class, action):
+    """Return the declared budget of ``action``, or ``None``."""
+    method = getattr(viewset_class, action, None)
+    budget = getattr(method, "query_budget", None)
+    if budget is None:
+        budget = getattr(viewset_class, "query_budgets", {}).get(action)
+    return budget
+
+
+class QueryCounter:
+    """Database execute wrapper counting the executed statements."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the queries of each request and enforce viewset budgets.
+
+    ``NETWORK_QUERY_BUDGET_OVERHEAD`` queries are allowed on top of each
+    budget for work outside the view, such as loading the session user.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        request.query_budget = None
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+
+        if settings.DEBUG:
+            response[QUERY_COUNT_HEADER] = str(counter.count)
+        budget = request.query_budget
+        if budget is not None:
+            budget += getattr(settings, "NETWORK_QUERY_BUDGET_OVERHEAD", 0)
+        if budget is not None and counter.count > budget:
+            message = (
+                f"{request.method} {request.path} ran {counter.count} "
+                f"queries, the budget is {budget}."
+            )
+            if getattr(settings, "NETWORK_QUERY_BUDGET_RAISE", False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Resolve the budget of the viewset action serving the request."""
+        viewset_class = getattr(view_func, "cls", None)
+        actions = getattr(view_func, "actions", None)
+        if viewset_class is None or not actions:
+            return None
+        action = actions.get(request.method.lower())
+        if action:
+            request.query_budget = get_query_budget(viewset_class, action)
+        return None
@@ -0,0 +1,93 @@
+"""
+Fast JSON and MessagePack renderers and parsers for the API.
+
+``ORJSONRenderer`` produces the same bytes as DRF's ``JSONRenderer`` for
+compact output: values ``orjson`` does not encode natively, Decimals and
+datetimes included, go through DRF's ``JSONEncoder.default``, so Decimals
+become floats and datetimes keep DRF's ``Z`` suffix. Indented output, as
+requested by the browsable API, and ASCII-only or non-compact settings
+fall back to the stdlib renderer.
+
+``application/msgpack`` is offered for service-to-service consumers and
+is chosen through the ``Accept`` and ``Content-Type`` headers or with
+``?format=msgpack``.
+"""
+
+import msgpack
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+LINE_SEPARATOR = "\u2028".encode()
+PARAGRAPH_SEPARATOR = "\u2029".encode()
+
+_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    """Convert values the encoders lack natively the way DRF does."""
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON renderer backed by ``orjson``."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        content = orjson.dumps(
+            data, default=encode_default, option=ORJSON_OPTIONS
+        )
+        # Escaped like JSONRenderer does, so the output is valid JavaScript
+        return content.replace(LINE_SEPARATOR, b"\\u2028").replace(
+            PARAGRAPH_SEPARATOR, b"\\u2029"
+        )
+
+
+class ORJSONParser(JSONParser):
+    """JSON parser backed by ``orjson``."""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renderer serializing to MessagePack."""
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(
+            data, default=encode_default, use_bin_type=True, datetime=False
+        )
+
+
+class MessagePackParser(BaseParser):
+    """Parser for MessagePack request bodies."""
+
+    media_type = "application/msgpack"
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (TypeError, ValueError) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
@@ -0,0 +1,266 @@
+"""
+Debt concentration report of the network, computed in the database.
+
+One statement groups the node table by supplier, node type, country and
+node type with country, ranks the groups and the largest debtors with
+window functions and returns only the rows the report shows. PostgreSQL
+groups with ``GROUPING SETS`` in a single scan; other databases run the
+same grouping as a ``UNION ALL`` of ``GROUP BY`` queries.
+
+The same statement ages the outstanding debt by the ``created_at`` of the
+ledger entries that raised it. Payments settle the oldest debt first, so
+the balance of a node is made up of its newest positive entries.
+
+Reports are cached for ``NETWORK_DEBT_REPORT_CACHE_TIMEOUT`` seconds.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+from .models import DebtLedgerEntry, NetworkNode
+
+REPORT_CACHE_KEY = "network:debt-report:{}"
+CENTS = Decimal("0.01")
+
+SUPPLIER = "supplier"
+DEBTOR = "debtor"
+NODE_TYPE = "node_type"
+COUNTRY = "country"
+NODE_TYPE_COUNTRY = "node_type_country"
+TOTAL = "total"
+AGING = "aging"
+# Age buckets in days, the last one is open-ended
+AGING_BUCKETS = [("0-30", 30), ("31-60", 60), ("61-90", 90), ("91+", None)]
+GROUP_SECTIONS = {
+    NODE_TYPE: ("by_node_type", ["node_type"]),
+    COUNTRY: ("by_country", ["country"]),
+    NODE_TYPE_COUNTRY: (
+        "by_node_type_and_country", ["node_type", "country"]
+    ),
+}
+
+# GROUPING(supplier_id, node_type, country) is a bit mask of the columns
+# a grouping set leaves out, the first column being the highest bit.
+GROUPING_SETS_SQL = f"""
+    SELECT
+        CASE GROUPING(supplier_id, node_type, country)
+            WHEN 3 THEN '{SUPPLIER}'
+            WHEN 5 THEN '{NODE_TYPE}'
+            WHEN 6 THEN '{COUNTRY}'
+            WHEN 4 THEN '{NODE_TYPE_COUNTRY}'
+            ELSE '{TOTAL}'
+        END AS section,
+        supplier_id AS node_id, node_type, country,
+        COUNT(*) AS node_count, SUM(debt) AS total_debt, NULL AS bucket
+    FROM {{table}}
+    GROUP BY GROUPING SETS (
+        (supplier_id), (node_type), (country), (node_type, country), ()
+    )
+"""
+
+UNION_ALL_SQL = f"""
+    SELECT '{SUPPLIER}' AS section, supplier_id AS node_id,
+        NULL AS node_type, NULL AS country,
+        COUNT(*) AS node_count, SUM(debt) AS total_debt, NULL AS bucket
+    FROM {{table}} GROUP BY supplier_id
+    UNION ALL
+    SELECT '{NODE_TYPE}', NULL, node_type, NULL, COUNT(*), SUM(debt), NULL
+    FROM {{table}} GROUP BY node_type
+    UNION ALL
+    SELECT '{COUNTRY}', NULL, NULL, country, COUNT(*), SUM(debt), NULL
+    FROM {{table}} GROUP BY country
+    UNION ALL
+    SELECT '{NODE_TYPE_COUNTRY}', NULL, node_type, country, COUNT(*),
+        SUM(debt), NULL
+    FROM {{table}} GROUP BY node_type, country
+    UNION ALL
+    SELECT '{TOTAL}', NULL, NULL, NULL, COUNT(*), SUM(debt), NULL
+    FROM {{table}}
+"""
+
+# ``newer`` is the sum of the positive entries after each entry; the
+# part of the balance left for an entry is clamped to its amount.
+AGING_SQL = """
+    aged AS (
+        SELECT
+            entry.node_id, entry.created_at, entry.amount,
+            node.debt AS balance,
+            SUM(entry.amount) OVER (
+                PARTITION BY entry.node_id ORDER BY entry.id DESC
+            ) - entry.amount AS newer
+        FROM {ledger} AS entry
+        JOIN {table} AS node ON node.id = entry.node_id
+        WHERE entry.amount > 0 AND node.debt > 0
+    ),
+    outstanding AS (
+        SELECT
+            node_id,
+            CASE {buckets} END AS bucket,
+            CASE
+                WHEN newer >= balance THEN 0
+                WHEN newer + amount <= balance THEN amount
+                ELSE balance - newer
+            END AS debt
+        FROM aged
+    ),
+"""
+
+REPORT_SQL = f"""
+    WITH {{aging}}
+    grouped AS (
+        {{grouped}}
+        UNION ALL
+        SELECT * FROM (
+            SELECT '{DEBTOR}' AS section, id AS node_id, node_type, country,
+                1 AS node_count, debt AS total_debt, NULL AS bucket
+            FROM {{table}}
+            WHERE debt > 0
+            ORDER BY debt DESC, id
+            LIMIT %s
+        ) AS debtors
+        UNION ALL
+        SELECT '{AGING}', NULL, NULL, NULL, COUNT(DISTINCT node_id),
+            SUM(debt), bucket
+        FROM outstanding
+        WHERE debt > 0
+        GROUP BY bucket
+    ),
+    ranked AS (
+        SELECT
+            grouped.*,
+            ROW_NUMBER() OVER (
+                PARTITION BY section
+                ORDER BY total_debt DESC, node_id, node_type, country,
+                    bucket
+            ) AS ordinal,
+            MAX(CASE WHEN section = '{TOTAL}' THEN total_debt END)
+                OVER () AS grand_total
+        FROM grouped
+        WHERE section <> '{SUPPLIER}' OR node_id IS NOT NULL
+    )
+    SELECT
+        ranked.section, ranked.node_id, node.name, ranked.node_type,
+        ranked.country, ranked.bucket, ranked.node_count, ranked.total_debt,
+        ranked.ordinal, ranked.grand_total
+    FROM ranked
+    LEFT JOIN {{table}} AS node ON node.id = ranked.node_id
+    WHERE ranked.section <> '{SUPPLIER}' OR ranked.ordinal <= %s
+    ORDER BY ranked.section, ranked.ordinal
+"""
+
+
+def _decimal(value):
+    return Decimal(str(value or 0)).quantize(CENTS)
+
+
+def _share(debt, total):
+    return float(debt / total) if total else 0.0
+
+
+def build_debt_report(top=10, using="default", grouping_sets=None):
+    """Compute the debt report in one round trip to the database.
+
+    Args:
+        top: Number of suppliers and debtors in the rankings.
+        using: Alias of the database to query.
+        grouping_sets: Whether to group with ``GROUPING SETS`` instead of
+            ``UNION ALL``, by default on PostgreSQL only.
+
+    Returns:
+        dict: Totals, the ``top`` suppliers by debt of their clients and
+        largest debtors, debt by node type, country and both, and the
+        outstanding debt by age.
+    """
+    connection = connections[using]
+    table = connection.ops.quote_name(NetworkNode._meta.db_table)
+    if grouping_sets is None:
+        grouping_sets = connection.vendor == "postgresql"
+    grouped = GROUPING_SETS_SQL if grouping_sets else UNION_ALL_SQL
+    now = timezone.now()
+    cutoffs = [
+        connection.ops.adapt_datetimefield_value(now - timedelta(days=days))
+        for _, days in AGING_BUCKETS[:-1]
+    ]
+    buckets = " ".join(
+        f"WHEN created_at >= %s THEN '{label}'"
+        for label, _ in AGING_BUCKETS[:-1]
+    ) + f" ELSE '{AGING_BUCKETS[-1][0]}'"
+    aging = AGING_SQL.format(
+        ledger=connection.ops.quote_name(DebtLedgerEntry._meta.db_table),
+        table=table,
+        buckets=buckets,
+    )
+    sql = REPORT_SQL.format(
+        aging=aging, grouped=grouped.format(table=table), table=table
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*cutoffs, top, top])
+        rows = cursor.fetchall()
+
+    report = {
+        "generated_at": now.isoformat(),
+        "total": {"node_count": 0, "total_debt": str(_decimal(0))},
+        "by_supplier": [],
+        "top_debtors": [],
+        "by_node_type": [],
+        "by_country": [],
+        "by_node_type_and_country": [],
+        "aging": [],
+    }
+    aging = {
+        label: {"bucket": label, "node_count": 0,
+                "total_debt": str(_decimal(0)), "share": 0.0}
+        for label, _ in AGING_BUCKETS
+    }
+    for (section, node_id, name, node_type, country, bucket, node_count,
+         total_debt, ordinal, grand_total) in rows:
+        debt = _decimal(total_debt)
+        share = _share(debt, _decimal(grand_total))
+        if section == TOTAL:
+            report["total"] = {
+                "node_count": node_count, "total_debt": str(debt),
+            }
+        elif section == SUPPLIER:
+            report["by_supplier"].append({
+                "rank": ordinal, "supplier": node_id, "name": name,
+                "client_count": node_count, "total_debt": str(debt),
+                "share": share,
+            })
+        elif section == DEBTOR:
+            report["top_debtors"].append({
+                "rank": ordinal, "id": node_id, "name": name,
+                "node_type": node_type, "country": country,
+                "debt": str(debt), "share": share,
+            })
+        elif section == AGING:
+            aging[bucket].update({
+                "node_count": node_count, "total_debt": str(debt),
+                "share": share,
+            })
+        else:
+            key, fields = GROUP_SECTIONS[section]
+            values = {"node_type": node_type, "country": country}
+            report[key].append({
+                **{field: values[field] for field in fields},
+                "node_count": node_count, "total_debt": str(debt),
+                "share": share,
+            })
+    report["aging"] = list(aging.values())
+    return report
+
+
+def get_debt_report(top=10):
+    """Return the debt report, computing it at most once per interval."""
+    key = REPORT_CACHE_KEY.format(top)
+    report = cache.get(key)
+    if report is None:
+        report = build_debt_report(top)
+        timeout = getattr(settings, "NETWORK_DEBT_REPORT_CACHE_TIMEOUT", 300)
+        if timeout:
+            cache.set(key, report, timeout)
+    return report
@@ -0,0 +1,107 @@
+"""
+Write-invalidated response cache for the network API.
+
+Successful ``list`` and ``retrieve`` responses are cached per URL,
+normalized query parameters and permission classes of the view, under the
+generation counters of the models they are built from. Every write bumps
+those counters, so stale entries are never read again and age out of the
+cache backend by TTL and, on the local-memory backend, LRU culling.
+
+The cache alias and timeout are the ``NETWORK_RESPONSE_CACHE`` and
+``NETWORK_RESPONSE_CACHE_TIMEOUT`` settings; a timeout of 0 disables it.
+"""
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils.crypto import md5
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import (
+    CacheModelsMixin, get_generation, get_invalidation_count, increment,
+    normalized_query,
+)
+
+STATUS_HEADER = "X-Response-Cache"
+HIT = "HIT"
+MISS = "MISS"
+RESPONSE_KEY = "network:response:{}:{}:{}"
+COUNTER_KEY = "network:response-cache:{}"
+
+
+def get_response_cache():
+    """Return the cache backend storing responses."""
+    return caches[getattr(settings, "NETWORK_RESPONSE_CACHE", "default")]
+
+
+def response_cache_key(view, request, models):
+    """Key of a response for the request, view and current data."""
+    query = normalized_query(request)
+    permissions = ",".join(
+        permission.__name__ for permission in view.permission_classes
+    )
+    generations = ":".join(str(get_generation(model)) for model in models)
+    digest = md5(
+        f"{request.build_absolute_uri(request.path)}?{query}|{permissions}"
+        .encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    return RESPONSE_KEY.format(type(view).__name__, generations, digest)
+
+
+def response_cache_stats(models=()):
+    """
+    Return the hit/miss counters, the hit ratio and how often each of
+    ``models`` was invalidated.
+    """
+    hits = cache.get(COUNTER_KEY.format(HIT), 0)
+    misses = cache.get(COUNTER_KEY.format(MISS), 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / lookups if lookups else 0.0,
+        "invalidations": {
+            model._meta.label: get_invalidation_count(model)
+            for model in models
+        },
+    }
+
+
+def reset_response_cache_stats():
+    """Reset the hit and miss counters."""
+    cache.delete_many([COUNTER_KEY.format(HIT), COUNTER_KEY.format(MISS)])
+
+
+class CachedResponseMixin(CacheModelsMixin):
+    """Serves ``list`` and ``retrieve`` from the response cache."""
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Return the cached response data or run ``handler`` and store it."""
+        timeout = getattr(settings, "NETWORK_RESPONSE_CACHE_TIMEOUT", 0)
+        if not timeout:
+            return handler(request, *args, **kwargs)
+
+        backend = get_response_cache()
+        key = response_cache_key(self, request, self.get_cache_models())
+        data = backend.get(key)
+        if data is not None:
+            increment(COUNTER_KEY.format(HIT))
+            response = Response(data)
+            response[STATUS_HEADER] = HIT
+            return response
+
+        increment(COUNTER_KEY.format(MISS))
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            backend.set(key, response.data, timeout)
+            response[STATUS_HEADER] = MISS
+        return response
@@ -0,0 +1,68 @@
+"""
+Full-text and trigram search for the network API.
+
+On PostgreSQL ``?search=`` matches a ``tsvector`` over the view's
+``search_fields`` (backed by a GIN expression index) or a ``pg_trgm``
+similarity on any of them, and results are ranked by relevance. Other
+databases fall back to the regular ``SearchFilter`` lookups.
+"""
+
+import operator
+from functools import reduce
+
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from rest_framework.filters import SearchFilter
+
+SEARCH_CONFIG = "simple"
+RANK_ANNOTATION = "search_rank"
+SIMILARITY_ANNOTATION = "search_similarity"
+
+
+def search_vector(*fields):
+    """Return the ``tsvector`` expression indexed for ``fields``."""
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector(*fields, config=SEARCH_CONFIG)
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Ranked full-text search with fuzzy trigram matches on PostgreSQL.
+
+    Annotates matches with ``search_rank`` and ``search_similarity`` and
+    orders by them, so an explicit ``?ordering=`` still takes precedence.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        terms = self.get_search_terms(request)
+        if not search_fields or not terms:
+            return queryset
+        if connections[queryset.db].vendor != "postgresql":
+            return super().filter_queryset(request, queryset, view)
+
+        from django.contrib.postgres.search import (
+            SearchQuery, SearchRank, TrigramSimilarity,
+        )
+
+        text = " ".join(terms)
+        fields = [field.lstrip("^=@$") for field in search_fields]
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type="plain")
+        similarities = [TrigramSimilarity(field, text) for field in fields]
+        matches = [Q(search_document=query)] + [
+            Q(**{f"{field}__trigram_similar": text}) for field in fields
+        ]
+        return (
+            queryset.alias(search_document=search_vector(*fields))
+            .filter(reduce(operator.or_, matches))
+            .annotate(**{
+                RANK_ANNOTATION: SearchRank(F("search_document"), query),
+                SIMILARITY_ANNOTATION: (
+                    Greatest(*similarities)
+                    if len(similarities) > 1 else similarities[0]
+                ),
+            })
+            .order_by(f"-{RANK_ANNOTATION}", f"-{SIMILARITY_ANNOTATION}")
+        )
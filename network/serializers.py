@@ -1,9 +1,25 @@
 # network/serializers.py
 from rest_framework import serializers
-from .models import NetworkNode, Product
+from .models import ChangeLog, DebtSnapshot, NetworkNode, Product
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Serializer mixin accepting a ``fields`` argument.
+
+    Only the listed fields are kept, so the response and the work spent on
+    serializing it shrink to what the client asked for.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Product model.
 
@@ -14,7 +30,7 @@ class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = ["id", "name", "model", "release_date",
-                  "price", "quantity", "nodes"]
+                  "price", "quantity", "nodes", "updated_at"]
 
     def to_representation(self, instance):
         """
@@ -30,13 +46,35 @@ class ProductSerializer(serializers.ModelSerializer):
             dict: The serialized representation of the Product
         """
         representation = super().to_representation(instance)
+        if "nodes" not in self.fields:
+            return representation
         representation["nodes"] = [
             {"id": node.id, "name": node.name} for node in instance.nodes.all()
         ]
         return representation
 
 
-class NetworkNodeSerializer(serializers.ModelSerializer):
+class ProductBatchItemSerializer(serializers.ModelSerializer):
+    """
+    Serializer validating one item of a batch product upsert.
+
+    Node ids are taken as plain integers, so validating a batch does not
+    query every node; their existence is checked once for the whole batch.
+    Items with an ``id`` update that product, the others create a new one.
+    """
+
+    id = serializers.IntegerField(required=False, min_value=1)
+    nodes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False
+    )
+
+    class Meta:
+        model = Product
+        fields = ["id", "name", "model", "release_date",
+                  "price", "quantity", "nodes"]
+
+
+class NetworkNodeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Basic serializer for NetworkNode model.
 
@@ -55,11 +93,16 @@ class NetworkNodeSerializer(serializers.ModelSerializer):
             "supplier",
             "debt",
             "level",
+            "subtree_debt",
+            "subtree_count",
             "created_at",
+            "updated_at",
         ]
 
 
-class NetworkNodeDetailSerializer(serializers.ModelSerializer):
+class NetworkNodeDetailSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
     """
     Detailed serializer for NetworkNode with expanded relationship data.
     Used for retrieve operations to provide more comprehensive information.
@@ -80,7 +123,10 @@ class NetworkNodeDetailSerializer(serializers.ModelSerializer):
             "supplier_details",
             "debt",
             "level",
+            "subtree_debt",
+            "subtree_count",
             "created_at",
+            "updated_at",
             "products",
         ]
 
@@ -95,6 +141,55 @@ class NetworkNodeDetailSerializer(serializers.ModelSerializer):
         return None
 
     def get_products(self, obj):
-        """Return all products associated with this node"""
-        products = obj.product_set.all()
-        return ProductSerializer(products, many=True).data
+        """
+        Return all products associated with this node.
+
+        Reads ``products`` and their ``nodes`` as loaded by the view, so
+        prefetched data is serialized without further queries.
+        """
+        products = obj.products.all()
+        return ProductSerializer(
+            products, many=True, context=self.context
+        ).data
+
+
+class ChangeLogSerializer(serializers.ModelSerializer):
+    """Serializer for change feed entries."""
+
+    class Meta:
+        model = ChangeLog
+        fields = ["id", "entity", "object_id", "action", "changed_at"]
+
+
+class DebtHistoryQuerySerializer(serializers.Serializer):
+    """Query parameters of the debt history endpoint."""
+
+    GROUPS = ["country", "node_type", "level"]
+
+    period = serializers.ChoiceField(
+        choices=DebtSnapshot.PERIODS, default=DebtSnapshot.MONTH
+    )
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+    node = serializers.IntegerField(required=False)
+    country = serializers.CharField(required=False)
+    node_type = serializers.ChoiceField(
+        choices=NetworkNode.NODE_TYPES, required=False
+    )
+    level = serializers.IntegerField(min_value=0, required=False)
+    group_by = serializers.ChoiceField(choices=GROUPS, required=False)
+
+
+class DebtHistoryBucketSerializer(serializers.Serializer):
+    """One bucket of the debt history series."""
+
+    date = serializers.DateField()
+    group = serializers.CharField(required=False)
+    total_debt = serializers.DecimalField(max_digits=20, decimal_places=2)
+    node_count = serializers.IntegerField()
+
+
+class DebtReportQuerySerializer(serializers.Serializer):
+    """Query parameters of the debt report endpoint."""
+
+    top = serializers.IntegerField(min_value=1, max_value=100, default=10)
@@ -0,0 +1,87 @@
+"""
+Signal handlers of the network application.
+
+Keeps denormalized hierarchy data of NetworkNode consistent for write paths
+that bypass ``NetworkNode.save()``, such as deletions, invalidates cached
+data built from written models and appends writes to the change log.
+"""
+
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_generation_on_commit
+from .models import ChangeLog, NetworkNode, NetworkStatistic, Product
+
+CHANGE_ENTITIES = {
+    NetworkNode: ChangeLog.NODE,
+    Product: ChangeLog.PRODUCT,
+}
+
+
+def touch_products(products):
+    """Mark products as updated, e.g. when their node set changes."""
+    pks = list(products.values_list("pk", flat=True))
+    Product.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+    ChangeLog.record(ChangeLog.PRODUCT, ChangeLog.UPDATED, pks)
+    bump_generation_on_commit(Product)
+
+
+@receiver(pre_delete, sender=NetworkNode)
+def detach_node_clients(sender, instance, **kwargs):
+    """Re-root the subtree of a node before it is deleted."""
+    instance.detach_descendants()
+    NetworkStatistic.apply(NetworkStatistic.node_deltas(
+        instance.level, instance.country, instance.debt, sign=-1
+    ))
+    # The node assignments are deleted by cascade without m2m_changed
+    touch_products(Product.objects.filter(nodes=instance))
+
+
+@receiver(post_save, sender=NetworkNode)
+@receiver(post_delete, sender=NetworkNode)
+def invalidate_node_caches(sender, **kwargs):
+    """Drop cached data built from network nodes."""
+    bump_generation_on_commit(NetworkNode)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_caches(sender, **kwargs):
+    """Drop cached data built from products."""
+    bump_generation_on_commit(Product)
+
+
+@receiver(post_save, sender=NetworkNode)
+@receiver(post_save, sender=Product)
+def log_saved(sender, instance, created, **kwargs):
+    """Append the save of a node or product to the change log."""
+    ChangeLog.record(
+        CHANGE_ENTITIES[sender],
+        ChangeLog.CREATED if created else ChangeLog.UPDATED,
+        [instance.pk],
+    )
+
+
+@receiver(post_delete, sender=NetworkNode)
+@receiver(post_delete, sender=Product)
+def log_deleted(sender, instance, **kwargs):
+    """Append a tombstone of a deleted node or product."""
+    ChangeLog.record(CHANGE_ENTITIES[sender], ChangeLog.DELETED, [instance.pk])
+
+
+@receiver(m2m_changed, sender=Product.nodes.through)
+def touch_assigned_products(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    """Mark products as modified when their node assignments change."""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        products = Product.objects.filter(pk=instance.pk)
+    elif action == "pre_clear":
+        products = Product.objects.filter(nodes=instance)
+    else:
+        products = Product.objects.filter(pk__in=pk_set)
+    touch_products(products)
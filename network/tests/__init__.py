@@ -0,0 +1,30 @@
+"""Helpers shared by the network tests."""
+
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.test import RequestFactory
+
+from network.models import NetworkNode
+
+
+def create_node(name, node_type, supplier=None, debt=0, country="RU"):
+    """Create a node with placeholder contact and address data."""
+    return NetworkNode.objects.create(
+        name=name,
+        email=f"{name.lower().replace(' ', '-')}@example.com",
+        country=country,
+        city="City",
+        street="Street",
+        house_number="1",
+        node_type=node_type,
+        supplier=supplier,
+        debt=debt,
+    )
+
+
+def admin_request(user):
+    """Return a request of ``user`` that admin actions can message."""
+    request = RequestFactory().post("/")
+    request.user = user
+    request.session = "session"
+    request._messages = FallbackStorage(request)
+    return request
@@ -3,7 +3,8 @@ from django.contrib.admin.sites import AdminSite
 from django.contrib.auth.models import User
 from django.contrib.messages.storage.fallback import FallbackStorage
 from network.admin import NetworkNodeAdmin
-from network.models import NetworkNode
+from network.models import NetworkNode, NetworkStatistic
+from network.tests import admin_request
 
 
 class AdminActionsTests(TestCase):
@@ -58,3 +59,27 @@ class AdminActionsTests(TestCase):
         # Refresh from database and check debt is cleared
         self.retail_node.refresh_from_db()
         self.assertEqual(self.retail_node.debt, 0)
+
+    def test_clear_debt_updates_statistics(self):
+        """Test that the admin action keeps the debt rollups in sync."""
+        request = admin_request(self.admin_user)
+
+        self.admin.clear_debt(request, NetworkNode.objects.all())
+
+        total = NetworkStatistic.objects.get(
+            dimension=NetworkStatistic.TOTAL
+        )
+        self.assertEqual(total.total_debt, 0)
+        self.assertEqual(total.node_count, 2)
+
+    def test_clear_debt_updates_subtree_rollups(self):
+        """Test that the admin action updates supplier subtree debt."""
+        request = admin_request(self.admin_user)
+
+        self.factory_node.refresh_from_db()
+        self.assertEqual(self.factory_node.subtree_debt, 1000)
+        self.admin.clear_debt(
+            request, NetworkNode.objects.filter(pk=self.retail_node.pk)
+        )
+        self.factory_node.refresh_from_db()
+        self.assertEqual(self.factory_node.subtree_debt, 0)
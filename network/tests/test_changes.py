@@ -0,0 +1,220 @@
+import threading
+from datetime import date
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection, connections, transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from network.importers import upsert_products
+from network.models import ChangeLog, NetworkNode, Product
+from network.tests import create_node
+
+
+class ChangeFeedTests(TransactionTestCase):
+    """
+    Tests for the change log and the incremental sync feed.
+
+    The feed hides entries of running transactions, so on PostgreSQL the
+    test data has to be committed.
+    """
+
+    def setUp(self):
+        user = User.objects.create_user(username="testuser", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+        self.url = reverse("change-list")
+
+        self.factory = create_node("Factory", "factory")
+        self.retail = create_node("Retail", "retail", self.factory)
+
+    def changes(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def entries(self, data):
+        return [
+            (item["entity"], item["object_id"], item["action"])
+            for item in data["results"]
+        ]
+
+    def test_feed_with_data_and_tombstones(self):
+        """Test created, updated and deleted entries with current data"""
+        start = self.changes()["next_since"]
+        product = Product.objects.create(
+            name="Phone", model="X", release_date=date(2024, 1, 1)
+        )
+        product.nodes.add(self.retail)
+        self.retail.debt = 50
+        self.retail.save()
+        product_id = product.id
+        product.delete()
+
+        with self.assertNumQueries(3):
+            data = self.changes(since=start)
+        self.assertEqual(self.entries(data), [
+            ("product", product_id, "created"),
+            ("product", product_id, "updated"),
+            ("node", self.retail.id, "updated"),
+            ("node", self.factory.id, "updated"),
+            ("product", product_id, "deleted"),
+        ])
+        results = data["results"]
+        self.assertEqual(results[2]["data"]["debt"], "50.00")
+        self.assertEqual(results[3]["data"]["subtree_debt"], "50.00")
+        self.assertIsNone(results[0]["data"])
+        self.assertIsNone(results[4]["data"])
+        self.assertFalse(data["has_more"])
+
+    def test_cursor_and_entity_filter(self):
+        """Test paging by the since cursor and filtering by entity"""
+        data = self.changes(limit=1)
+        self.assertEqual(self.entries(data), [
+            ("node", self.factory.id, "created"),
+        ])
+        self.assertTrue(data["has_more"])
+        data = self.changes(since=data["next_since"], entity="node")
+        self.assertEqual(
+            [entry[1:] for entry in self.entries(data)],
+            [(self.retail.id, "created"), (self.factory.id, "updated")],
+        )
+        self.assertEqual(data["results"][0]["data"]["name"], "Retail")
+
+        data = self.changes(since=data["next_since"])
+        self.assertEqual(data["results"], [])
+        self.assertEqual(
+            data["next_since"], f"0.{ChangeLog.objects.last().id}"
+        )
+
+    def test_bulk_paths_are_logged(self):
+        """Test that batch upserts and node deletions are logged"""
+        start = self.changes()["next_since"]
+        retail_id = self.retail.id
+        result = upsert_products([{
+            "name": "Phone", "model": "X", "release_date": "2024-01-01",
+            "nodes": [self.retail.id],
+        }])
+        product_id = result["created"][0]
+        self.retail.delete()
+        self.assertEqual(self.entries(self.changes(since=start)), [
+            ("product", product_id, "created"),
+            ("node", self.factory.id, "updated"),
+            ("product", product_id, "updated"),
+            ("node", retail_id, "deleted"),
+        ])
+
+    def test_invalid_parameters(self):
+        """Test that malformed cursors and entities are rejected"""
+        for params in (
+            {"since": "-1"}, {"since": "1.2.3"}, {"since": "a.1"},
+            {"limit": "x"}, {"entity": "user"},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+
+    def test_plain_id_cursor(self):
+        """Test that ids from older clients are accepted as cursors"""
+        first = ChangeLog.objects.order_by("id").first()
+        data = self.changes(since=first.id, limit=1)
+        self.assertEqual(data["results"][0]["id"], first.id + 1)
+
+    def test_interleaved_transactions(self):
+        """Test that a transaction committing late is not skipped"""
+        start = self.changes()["next_since"]
+        base = int(start.split(".")[0])
+        # Transaction base + 11 commits first while base + 10 is still
+        # running; its entry only becomes visible after the horizon moves.
+        late = ChangeLog(
+            entity=ChangeLog.NODE, object_id=self.factory.id,
+            action=ChangeLog.UPDATED, transaction_id=base + 10,
+        )
+        early = ChangeLog.objects.create(
+            entity=ChangeLog.NODE, object_id=self.retail.id,
+            action=ChangeLog.UPDATED, transaction_id=base + 11,
+        )
+        with mock.patch.object(
+            ChangeLog, "commit_horizon", return_value=base + 10
+        ):
+            data = self.changes(since=start)
+        self.assertEqual(data["results"], [])
+        self.assertEqual(data["next_since"], start)
+
+        late.save()
+        with mock.patch.object(
+            ChangeLog, "commit_horizon", return_value=base + 12
+        ):
+            data = self.changes(since=start)
+        self.assertEqual(
+            [item["id"] for item in data["results"]], [late.id, early.id]
+        )
+        self.assertEqual(data["next_since"], f"{base + 11}.{early.id}")
+
+
+@skipUnless(connection.vendor == "postgresql", "Needs transaction ids")
+class CommitHorizonTests(TransactionTestCase):
+    """Tests for the change feed against real PostgreSQL transactions."""
+
+    def setUp(self):
+        user = User.objects.create_user(username="testuser", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+        self.url = reverse("change-list")
+
+    def changes(self, since):
+        response = self.client.get(self.url, {"since": since})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_entries_carry_transaction_ids(self):
+        """Test that entries of one transaction share its id"""
+        with transaction.atomic():
+            factory = create_node("Factory", "factory")
+            create_node("Retail", "retail", factory)
+            self.assertFalse(ChangeLog.committed().exists())
+        first = set(
+            ChangeLog.committed().values_list("transaction_id", flat=True)
+        )
+        create_node("Shop", "retail", factory)
+
+        self.assertEqual(len(first), 1)
+        second = set(
+            ChangeLog.committed().values_list("transaction_id", flat=True)
+        ) - first
+        self.assertEqual(len(second), 1)
+        self.assertGreater(second.pop(), first.pop())
+
+    def test_late_commit_not_skipped(self):
+        """Test that a transaction committing out of order is served"""
+        start = self.changes(0)["next_since"]
+        started, finish = threading.Event(), threading.Event()
+
+        def writer():
+            try:
+                with transaction.atomic():
+                    create_node("Late", "factory")
+                    started.set()
+                    finish.wait(5)
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        started.wait(5)
+        early = create_node("Early", "factory")
+        data = self.changes(start)
+        self.assertEqual(data["results"], [])
+        self.assertEqual(data["next_since"], start)
+
+        finish.set()
+        thread.join()
+        data = self.changes(start)
+        self.assertEqual(
+            [item["object_id"] for item in data["results"]],
+            [NetworkNode.objects.get(name="Late").id, early.id],
+        )
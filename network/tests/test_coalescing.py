@@ -0,0 +1,149 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from network.coalescing import (
+    CACHE_KEY, COALESCED, HIT, LOCK_KEY, MISS, STATUS_HEADER, SingleFlight,
+    coalesce, flight,
+)
+
+
+class SingleFlightTests(SimpleTestCase):
+    """Tests for the single-flight coalescing group."""
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        time.sleep(0.2)
+        return {"value": self.calls}
+
+    def test_concurrent_calls_share_one_computation(self):
+        """Test that concurrent callers wait for the running call."""
+        results = []
+
+        def worker():
+            results.append(self.flight.do("key", self.compute, ttl=0))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual({value["value"] for value, _ in results}, {1})
+        self.assertEqual(
+            self.flight.stats(), {HIT: 0, MISS: 1, COALESCED: 4}
+        )
+
+    def test_result_reused_within_ttl(self):
+        """Test that a stored result is served until the TTL expires."""
+        self.flight.do("key", self.compute, ttl=60)
+        value, outcome = self.flight.do("key", self.compute, ttl=60)
+
+        self.assertEqual(outcome, HIT)
+        self.assertEqual(value, {"value": 1})
+        self.assertEqual(self.calls, 1)
+
+    def test_errors_are_not_stored(self):
+        """Test that a failing computation is retried by the next caller."""
+
+        def fail():
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            self.flight.do("key", fail, ttl=60)
+        value, outcome = self.flight.do("key", self.compute, ttl=60)
+        self.assertEqual(outcome, MISS)
+
+
+class ReportView:
+    """Stands in for a viewset with coalesced actions."""
+
+    def __init__(self, status_code=status.HTTP_200_OK):
+        self.status_code = status_code
+        self.calls = 0
+
+    def respond(self):
+        self.calls += 1
+        return Response({"calls": self.calls}, status=self.status_code)
+
+    @coalesce(ttl=60, shared=False)
+    def local(self, request):
+        return self.respond()
+
+    @coalesce(ttl=60, shared=True, lock_timeout=5)
+    def shared(self, request):
+        return self.respond()
+
+
+class CoalesceDecoratorTests(SimpleTestCase):
+    """Tests for the coalesce decorator of viewset actions."""
+
+    def setUp(self):
+        cache.clear()
+        flight.reset()
+        self.view = ReportView()
+
+    def request(self, query="b=2&a=1"):
+        return Request(APIRequestFactory().get(f"/report/?{query}"))
+
+    def test_response_shared_with_header(self):
+        """Test that identical requests reuse the response"""
+        first = self.view.local(self.request())
+        second = self.view.local(self.request("a=1&b=2"))
+
+        self.assertEqual(first[STATUS_HEADER], MISS)
+        self.assertEqual(second[STATUS_HEADER], HIT)
+        self.assertEqual(second.data, {"calls": 1})
+        other = self.view.local(self.request("a=2"))
+        self.assertEqual(other.data, {"calls": 2})
+
+    def test_errors_not_shared(self):
+        """Test that non-200 responses are returned but not reused"""
+        view = ReportView(status.HTTP_404_NOT_FOUND)
+        for calls in (1, 2):
+            response = view.local(self.request())
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            self.assertNotIn(STATUS_HEADER, response)
+            self.assertEqual(view.calls, calls)
+        self.assertEqual(flight.stats()[HIT], 0)
+
+    def test_shared_result_counts_as_hit(self):
+        """Test that a result stored by another process is a hit"""
+        self.view.shared(self.request())
+        # Another process has its own single-flight group
+        flight.reset()
+        response = self.view.shared(self.request())
+
+        self.assertEqual(response[STATUS_HEADER], HIT)
+        self.assertEqual(response.data, {"calls": 1})
+        self.assertEqual(flight.stats(), {HIT: 1, MISS: 0, COALESCED: 0})
+
+    def test_shared_lock_waits_for_holder(self):
+        """Test that the lock holder's result is used instead of computing"""
+        key = "ReportView.shared:/report/?a=1&b=2"
+        cache.add(LOCK_KEY.format(key), True, 5)
+
+        def holder():
+            time.sleep(0.2)
+            cache.set(CACHE_KEY.format(key), {"calls": "other"}, 60)
+            cache.delete(LOCK_KEY.format(key))
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        response = self.view.shared(self.request())
+        thread.join()
+
+        self.assertEqual(response.data, {"calls": "other"})
+        self.assertEqual(response[STATUS_HEADER], HIT)
+        self.assertEqual(self.view.calls, 0)
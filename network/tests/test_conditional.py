@@ -0,0 +1,143 @@
+import time
+from datetime import date
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from network.admin import NetworkNodeAdmin
+from network.cache import MODIFIED_KEY
+from network.models import NetworkNode, Product
+from network.tests import admin_request
+
+
+class ConditionalGetTests(TestCase):
+    """Tests for ETag and Last-Modified handling of nodes and products."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username="admin", password="x", email="admin@example.com"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        cache.clear()
+
+        self.node = NetworkNode.objects.create(
+            name="Factory", email="factory@example.com", country="RU",
+            city="Moscow", street="Street", house_number="1",
+            node_type="factory", debt=100,
+        )
+        self.product = Product.objects.create(
+            name="Phone", model="X", release_date=date(2024, 1, 1)
+        )
+        self.products_url = reverse("product-list")
+        # Last-Modified is only sent for writes in past seconds
+        for model in (NetworkNode, Product):
+            cache.set(
+                MODIFIED_KEY.format(model._meta.label_lower),
+                time.time() - 60,
+            )
+
+    def assert_not_modified(self, url, response):
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(cached["ETag"], response["ETag"])
+
+    def assert_modified(self, url, response):
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(fresh.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(fresh["ETag"], response["ETag"])
+        return fresh
+
+    def test_list_not_modified_without_queries(self):
+        """Test that an unchanged list is answered with 304"""
+        response = self.client.get(self.products_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", response)
+        self.assert_not_modified(self.products_url, response)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.quantity = 5
+            self.product.save()
+        self.assert_modified(self.products_url, response)
+
+    def test_node_assignment_changes_product_etag(self):
+        """Test that M2M changes from the node side invalidate products"""
+        response = self.client.get(self.products_url)
+        before = Product.objects.get(pk=self.product.pk).updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            self.node.products.add(self.product)
+        fresh = self.assert_modified(self.products_url, response)
+        self.assertEqual(
+            fresh.data["results"][0]["nodes"][0]["name"], "Factory"
+        )
+        self.assertGreater(
+            Product.objects.get(pk=self.product.pk).updated_at, before
+        )
+
+    def test_detail_if_modified_since(self):
+        """Test Last-Modified based validation of node details"""
+        url = reverse("networknode-detail", args=[self.node.id])
+        response = self.client.get(url)
+        cached = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_same_second_change_not_hidden(self):
+        """Test that Last-Modified is omitted until its second is over"""
+        url = reverse("networknode-detail", args=[self.node.id])
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.node.debt = 50
+            self.node.save()
+
+        fresh = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(fresh.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Last-Modified", fresh)
+
+    def test_node_list_ignores_product_writes(self):
+        """Test that only node details depend on products"""
+        list_url = reverse("networknode-list")
+        detail_url = reverse("networknode-detail", args=[self.node.id])
+        listed = self.client.get(list_url)
+        detail = self.client.get(detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.quantity = 5
+            self.product.save()
+        self.assert_not_modified(list_url, listed)
+        self.assert_modified(detail_url, detail)
+
+    def test_admin_clear_debt_changes_etag(self):
+        """Test that the bulk admin action bumps the node version"""
+        url = reverse("networknode-detail", args=[self.node.id])
+        response = self.client.get(url)
+        self.assert_not_modified(url, response)
+
+        node_admin = NetworkNodeAdmin(NetworkNode, AdminSite())
+        with self.captureOnCommitCallbacks(execute=True):
+            node_admin.clear_debt(
+                admin_request(self.user),
+                NetworkNode.objects.filter(pk=self.node.pk),
+            )
+        fresh = self.assert_modified(url, response)
+        self.assertEqual(fresh.data["debt"], "0.00")
+        self.assertGreater(
+            fresh.data["updated_at"], response.data["updated_at"]
+        )
+
+    def test_etag_depends_on_media_type(self):
+        """Test that JSON and MessagePack bodies get different ETags"""
+        json_response = self.client.get(self.products_url)
+        msgpack_response = self.client.get(
+            self.products_url, HTTP_ACCEPT="application/msgpack"
+        )
+        self.assertNotEqual(json_response["ETag"], msgpack_response["ETag"])
+        self.assertIn("Accept", msgpack_response["Vary"])
@@ -0,0 +1,141 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db.models import Sum
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from network.importers import import_nodes
+from network.models import (
+    ChangeLog, DebtLedgerEntry, NetworkNode, NetworkStatistic,
+)
+from network.tests import create_node
+
+
+class DebtLedgerTests(TestCase):
+    """Tests for the debt ledger and atomic debt balance updates."""
+
+    def setUp(self):
+        user = User.objects.create_user(username="testuser", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+
+        self.factory = create_node("Factory", "factory")
+        self.retail = create_node(
+            "Retail", "retail", self.factory, debt=1000
+        )
+        self.shop = create_node(
+            "Shop", "entrepreneur", self.retail, debt=250
+        )
+
+    def assert_ledger_matches_balances(self):
+        balances = dict(
+            DebtLedgerEntry.objects.values("node")
+            .annotate(total=Sum("amount"))
+            .values_list("node", "total")
+        )
+        for node in NetworkNode.objects.all():
+            self.assertEqual(balances.get(node.pk, 0), node.debt)
+
+    def test_save_records_adjustments(self):
+        """Test that debt set through save() is recorded in the ledger"""
+        self.retail.debt = 400
+        self.retail.save()
+        amounts = list(
+            self.retail.debt_entries.order_by("id")
+            .values_list("kind", "amount")
+        )
+        self.assertEqual(amounts, [
+            (DebtLedgerEntry.ADJUSTMENT, Decimal("1000.00")),
+            (DebtLedgerEntry.ADJUSTMENT, Decimal("-600.00")),
+        ])
+        self.assert_ledger_matches_balances()
+
+    def test_change_debts_does_not_lose_updates(self):
+        """Test that debt changes apply to the current balance"""
+        stale = NetworkNode.objects.get(pk=self.retail.pk)
+        NetworkNode.change_debts({self.retail.pk: 100}, DebtLedgerEntry.CHARGE)
+        NetworkNode.change_debts(
+            {stale.pk: Decimal("-30.50"), self.shop.pk: 50},
+            DebtLedgerEntry.PAYMENT,
+        )
+
+        self.retail.refresh_from_db()
+        self.factory.refresh_from_db()
+        self.assertEqual(self.retail.debt, Decimal("1069.50"))
+        self.assertEqual(self.retail.subtree_debt, Decimal("1369.50"))
+        self.assertEqual(self.factory.subtree_debt, Decimal("1369.50"))
+        total = NetworkStatistic.objects.get(
+            dimension=NetworkStatistic.TOTAL
+        )
+        self.assertEqual(total.total_debt, Decimal("1369.50"))
+        self.assert_ledger_matches_balances()
+
+    def test_writes_lock_ancestors_in_pk_order(self):
+        """Test that nodes are locked together with their ancestors"""
+        with self.assertNumQueries(2):
+            locked = NetworkNode._lock_nodes([self.shop.pk])
+        self.assertEqual(
+            list(locked), [self.factory.pk, self.retail.pk, self.shop.pk]
+        )
+
+        # A moved node also locks the subtree whose paths are rebased
+        locked = NetworkNode._lock_nodes(
+            [self.retail.pk], descendants_of=[self.retail.pk]
+        )
+        self.assertEqual(
+            list(locked), [self.factory.pk, self.retail.pk, self.shop.pk]
+        )
+
+    def test_clear_debt_endpoint_bypasses_save(self):
+        """Test that clearing debt is an UPDATE maintaining all rollups"""
+        start = ChangeLog.objects.last().id
+        url = reverse("networknode-clear-debt", args=[self.retail.pk])
+        with mock.patch.object(
+            NetworkNode, "save", side_effect=AssertionError
+        ):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.retail.refresh_from_db()
+        self.factory.refresh_from_db()
+        self.assertEqual(self.retail.debt, 0)
+        self.assertEqual(self.retail.subtree_debt, 250)
+        self.assertEqual(self.factory.subtree_debt, 250)
+        level = NetworkStatistic.objects.get(
+            dimension=NetworkStatistic.LEVEL, key="1"
+        )
+        self.assertEqual(level.total_debt, 0)
+        entry = self.retail.debt_entries.latest("id")
+        self.assertEqual(entry.kind, DebtLedgerEntry.CLEARED)
+        self.assertEqual(entry.amount, Decimal("-1000.00"))
+        self.assertEqual(
+            set(ChangeLog.objects.filter(id__gt=start).values_list(
+                "object_id", flat=True
+            )),
+            {self.factory.pk, self.retail.pk},
+        )
+        self.assert_ledger_matches_balances()
+
+        # Clearing again changes nothing
+        self.assertEqual(
+            NetworkNode.clear_debts(NetworkNode.objects.all()), 1
+        )
+        self.assertEqual(NetworkNode.clear_debts(NetworkNode.objects.all()), 0)
+
+    def test_import_records_opening_balances(self):
+        """Test that imported nodes with debt get a ledger entry"""
+        nodes = import_nodes([
+            {"ref": "a", "name": "Imported", "email": "a@example.com",
+             "country": "RU", "city": "Moscow", "street": "Street",
+             "house_number": "1", "node_type": "retail",
+             "supplier": self.factory.pk, "debt": "75.25"},
+        ])
+        self.assertEqual(
+            list(nodes[0].debt_entries.values_list("amount", flat=True)),
+            [Decimal("75.25")],
+        )
+        self.assert_ledger_matches_balances()
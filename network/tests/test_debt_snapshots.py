@@ -0,0 +1,133 @@
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from network.models import DebtLedgerEntry, DebtSnapshot, NetworkNode
+from network.tests import create_node
+
+
+class DebtSnapshotTests(TestCase):
+    """Tests for debt snapshots, downsampling and the history endpoint."""
+
+    def setUp(self):
+        user = User.objects.create_user(username="testuser", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+        self.url = reverse("networknode-debt-history")
+
+        self.factory = create_node("Factory", "factory")
+        self.retail = create_node(
+            "Retail", "retail", self.factory, debt=100
+        )
+        self.shop = create_node(
+            "Shop", "entrepreneur", self.factory, debt=40, country="KZ"
+        )
+
+    def snapshot(self, day, retail_debt):
+        NetworkNode.change_debts(
+            {self.retail.pk: retail_debt - self.retail.debt},
+            DebtLedgerEntry.ADJUSTMENT,
+        )
+        self.retail.refresh_from_db()
+        call_command(
+            "snapshot_debts", date=day.isoformat(), keep_days=45,
+            stdout=StringIO(),
+        )
+
+    def history(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            (item["date"], item.get("group"), item["total_debt"],
+             item["node_count"])
+            for item in response.data["results"]
+        ]
+
+    def test_take_replaces_snapshot_of_same_day(self):
+        """Test that snapshots are bulk inserted once per node and day"""
+        with self.assertNumQueries(6):
+            self.assertEqual(
+                DebtSnapshot.take(date(2026, 1, 5), batch_size=2), 3
+            )
+        DebtSnapshot.take(date(2026, 1, 5))
+        self.assertEqual(DebtSnapshot.objects.count(), 3)
+        snapshot = DebtSnapshot.objects.get(node=self.shop)
+        self.assertEqual(
+            (snapshot.country, snapshot.node_type, snapshot.level),
+            ("KZ", "entrepreneur", 1),
+        )
+
+    def test_downsampling_keeps_month_end(self):
+        """Test that old daily snapshots collapse into monthly ones"""
+        self.snapshot(date(2026, 1, 10), 100)
+        self.snapshot(date(2026, 1, 31), 300)
+        self.snapshot(date(2026, 2, 1), 200)
+        self.snapshot(date(2026, 3, 20), 150)
+
+        # January ended more than 45 days before March 20
+        self.assertEqual(
+            list(
+                DebtSnapshot.objects.filter(node=self.retail)
+                .order_by("date").values_list("period", "date", "debt")
+            ),
+            [
+                (DebtSnapshot.MONTH, date(2026, 1, 1), 300),
+                (DebtSnapshot.DAY, date(2026, 2, 1), 200),
+                (DebtSnapshot.DAY, date(2026, 3, 20), 150),
+            ],
+        )
+
+        with self.assertNumQueries(1):
+            monthly = self.history(node_type="retail")
+        self.assertEqual(monthly, [
+            ("2026-01-01", None, "300.00", 1),
+            ("2026-02-01", None, "200.00", 1),
+            ("2026-03-01", None, "150.00", 1),
+        ])
+        daily = self.history(period="day", since="2026-02-01")
+        self.assertEqual(daily, [
+            ("2026-02-01", None, "240.00", 3),
+            ("2026-03-20", None, "190.00", 3),
+        ])
+
+    def test_grouped_and_filtered_series(self):
+        """Test grouping by a dimension and filtering by level"""
+        self.snapshot(date(2026, 3, 1), 100)
+        self.assertEqual(self.history(group_by="country"), [
+            ("2026-03-01", "KZ", "40.00", 1),
+            ("2026-03-01", "RU", "100.00", 2),
+        ])
+        self.assertEqual(self.history(level=0), [
+            ("2026-03-01", None, "0.00", 1),
+        ])
+
+    def test_history_survives_node_deletion(self):
+        """Test that deleting a node keeps its past snapshots"""
+        self.snapshot(date(2026, 3, 1), 100)
+        shop_id = self.shop.pk
+        self.shop.delete()
+
+        self.assertEqual(
+            DebtSnapshot.objects.filter(node_id=shop_id).count(), 1
+        )
+        self.assertEqual(self.history(group_by="country"), [
+            ("2026-03-01", "KZ", "40.00", 1),
+            ("2026-03-01", "RU", "100.00", 2),
+        ])
+
+    def test_invalid_parameters(self):
+        """Test that malformed filters are rejected"""
+        for params in (
+            {"period": "year"}, {"since": "yesterday"},
+            {"group_by": "city"}, {"level": "-1"},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
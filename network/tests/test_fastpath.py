@@ -0,0 +1,78 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from network.models import NetworkNode, Product
+
+
+class FastListSerializationTests(TestCase):
+    """The values() list path must render the serializer's exact bytes."""
+
+    def setUp(self):
+        user = User.objects.create_user(username="testuser", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+
+        factory = NetworkNode.objects.create(
+            name="Factory", email="factory@example.com", country="RU",
+            city="Moscow", street="Street", house_number="1",
+            node_type="factory",
+        )
+        nodes = [factory]
+        for i in range(5):
+            nodes.append(NetworkNode.objects.create(
+                name=f"Retail {i}", email=f"retail{i}@example.com",
+                country="RU", city="Kazan", street="Street",
+                house_number=str(i), node_type="retail", supplier=factory,
+                debt=Decimal("10.50") * i,
+            ))
+        for i in range(7):
+            product = Product.objects.create(
+                name=f"Product {i}", model=f"Model {i % 3}",
+                release_date=date(2024, 1, 1 + i % 2),
+                price=Decimal("99.90") + i, quantity=i,
+            )
+            product.nodes.add(*nodes[i % 3:i % 3 + 2])
+        Product.objects.create(
+            name="Orphan", model="Model 0", release_date=date(2024, 1, 1)
+        )
+
+    def assert_same_pages(self, url, params):
+        """Walk all pages with both paths and compare the raw bodies."""
+        bodies = {}
+        for fast in (False, True):
+            with override_settings(NETWORK_FAST_LIST_SERIALIZATION=fast):
+                pages, next_url = [], url
+                query = params
+                while next_url:
+                    response = self.client.get(next_url, query)
+                    self.assertEqual(response.status_code, 200)
+                    pages.append(response.content)
+                    next_url, query = response.data["next"], None
+                bodies[fast] = pages
+        self.assertGreater(len(bodies[False]), 1)
+        self.assertEqual(bodies[True], bodies[False])
+
+    def test_products_identical(self):
+        """Test products with their nodes page by page"""
+        self.assert_same_pages(reverse("product-list"), {"page_size": 3})
+
+    def test_nodes_identical(self):
+        """Test nodes ordered by debt with a sparse fieldset"""
+        self.assert_same_pages(
+            reverse("networknode-list"),
+            {"page_size": 2, "ordering": "-debt", "exclude": "city"},
+        )
+        self.assert_same_pages(reverse("networknode-list"), {"page_size": 4})
+
+    @override_settings(NETWORK_FAST_LIST_SERIALIZATION=True)
+    def test_products_query_count(self):
+        """Test that nodes are attached with one grouped query"""
+        with self.assertNumQueries(2):
+            self.client.get(reverse("product-list"), {"page_size": 100})
+        with self.assertNumQueries(1):
+            self.client.get(reverse("product-list"), {"exclude": "nodes"})
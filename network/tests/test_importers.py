@@ -0,0 +1,188 @@
+import csv
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from network import importers
+from network.importers import NodeImportError, import_nodes
+from network.models import NetworkNode, NetworkStatistic
+
+
+def node_row(ref, node_type, **extra):
+    row = {
+        "ref": ref,
+        "name": f"Node {ref}",
+        "email": f"{ref}@example.com",
+        "country": "Country",
+        "city": "City",
+        "street": "Street",
+        "house_number": "1",
+        "node_type": node_type,
+    }
+    row.update(extra)
+    return row
+
+
+class ImportNodesTests(TestCase):
+    """Tests for the bulk node import pipeline."""
+
+    def setUp(self):
+        self.factory = NetworkNode.objects.create(
+            name="Existing Factory",
+            email="factory@example.com",
+            country="Country",
+            city="City",
+            street="Street",
+            house_number="1",
+            node_type="factory",
+        )
+
+    def test_import_hierarchy(self):
+        """Test importing rows listed before their suppliers."""
+        nodes = import_nodes([
+            node_row("c", "entrepreneur", supplier_ref="b", debt="5.50"),
+            node_row("b", "retail", supplier=self.factory.pk, debt="10"),
+            node_row("a", "factory"),
+        ])
+
+        client, retail, factory = nodes
+        self.assertEqual(retail.level, 1)
+        self.assertEqual(client.level, 2)
+        self.assertEqual(client.supplier_id, retail.pk)
+        self.assertEqual(
+            client.path, f"/{self.factory.pk}/{retail.pk}/"
+        )
+        self.assertEqual(factory.path, "/")
+
+        self.factory.refresh_from_db()
+        self.assertEqual(self.factory.subtree_debt, Decimal("15.50"))
+        self.assertEqual(self.factory.subtree_count, 3)
+        total = NetworkStatistic.objects.get(
+            dimension=NetworkStatistic.TOTAL
+        )
+        self.assertEqual(total.node_count, 4)
+        self.assertEqual(total.total_debt, Decimal("15.50"))
+
+    def test_supplier_moved_after_validation(self):
+        """Test that supplier paths are read again under the lock."""
+        retail = NetworkNode.objects.create(
+            name="Retail", email="retail@example.com", country="Country",
+            city="City", street="Street", house_number="1",
+            node_type="retail",
+        )
+        resolve = importers._resolve_suppliers
+
+        def resolve_then_move(rows):
+            existing = resolve(rows)
+            retail.supplier = self.factory
+            retail.save()
+            return existing
+
+        with mock.patch.object(
+            importers, "_resolve_suppliers", side_effect=resolve_then_move
+        ):
+            (client,) = import_nodes([
+                node_row("a", "entrepreneur", supplier=retail.pk, debt="3"),
+            ])
+        self.assertEqual(client.path, f"/{self.factory.pk}/{retail.pk}/")
+        self.assertEqual(client.level, 2)
+        self.factory.refresh_from_db()
+        self.assertEqual(self.factory.subtree_count, 3)
+        self.assertEqual(self.factory.subtree_debt, Decimal("3"))
+
+    def test_invalid_rows_are_reported(self):
+        """Test that cycles, factories with suppliers and bad fields fail."""
+        with self.assertRaises(NodeImportError) as context:
+            import_nodes([
+                node_row("a", "retail", supplier_ref="b"),
+                node_row("b", "retail", supplier_ref="a"),
+                node_row("c", "factory", supplier=self.factory.pk),
+                node_row("d", "retail", email="not-an-email"),
+                node_row("e", "retail", supplier_ref="missing"),
+            ])
+
+        errors = {
+            error["row"]: error["errors"]
+            for error in context.exception.errors
+        }
+        self.assertEqual(set(errors), {0, 1, 2, 3, 4})
+        self.assertIn("email", errors[3])
+        self.assertEqual(NetworkNode.objects.count(), 1)
+
+    def test_management_command(self):
+        """Test importing nodes from a CSV file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "nodes.csv"
+            with path.open("w", newline="") as file:
+                writer = csv.DictWriter(
+                    file,
+                    fieldnames=[*node_row("a", "factory"), "supplier_ref"],
+                )
+                writer.writeheader()
+                writer.writerow(node_row("a", "factory"))
+                writer.writerow(node_row("b", "retail", supplier_ref="a"))
+            call_command("import_nodes", str(path), stdout=StringIO())
+
+        self.assertEqual(
+            NetworkNode.objects.get(name="Node b").supplier.name, "Node a"
+        )
+
+
+class BulkCreateAPITests(TestCase):
+    """Tests for the bulk_create action of the nodes API."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("networknode-bulk-create")
+
+    def test_bulk_create(self):
+        """Test creating a hierarchy in one request"""
+        response = self.client.post(
+            self.url,
+            [node_row("a", "factory"),
+             node_row("b", "retail", supplier_ref="a")],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 2)
+        factory_id, retail_id = response.data["ids"]
+        self.assertEqual(
+            NetworkNode.objects.get(pk=retail_id).supplier_id, factory_id
+        )
+
+    def test_bulk_create_errors(self):
+        """Test that invalid rows are reported per row"""
+        response = self.client.post(
+            self.url, [node_row("a", "unknown")], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["errors"][0]["row"], 0)
+        self.assertIn("node_type", response.data["errors"][0]["errors"])
+
+    def test_bulk_create_malformed_rows(self):
+        """Test that bad supplier ids and non-object rows are row errors"""
+        response = self.client.post(
+            self.url,
+            [node_row("a", "retail", supplier="abc"), 1, [2]],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = {
+            item["row"]: item["errors"] for item in response.data["errors"]
+        }
+        self.assertIn("supplier", errors[0])
+        self.assertIn("non_field_errors", errors[1])
+        self.assertIn("non_field_errors", errors[2])
@@ -1,7 +1,10 @@
 # network/tests/test_models.py
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ValidationError
-from network.models import NetworkNode, Product
+from network.models import NetworkNode, NetworkStatistic, Product
+from network.tests import create_node
 from decimal import Decimal
 from datetime import date
 
@@ -103,6 +106,88 @@ class NetworkNodeModelTests(TestCase):
         # Check that the entrepreneur's level is still 2
         self.assertEqual(self.entrepreneur.level, 2)
 
+    def test_reparent_relevels_subtree_in_bulk(self):
+        """Test that re-parenting updates the whole subtree set-based."""
+        entrepreneurs = [
+            NetworkNode.objects.create(
+                name=f"Client {i}",
+                email=f"client{i}@example.com",
+                country="Test Country",
+                city="Test City",
+                street="Client Street",
+                house_number=str(i),
+                node_type="entrepreneur",
+                supplier=self.entrepreneur,
+            )
+            for i in range(5)
+        ]
+        new_retail = NetworkNode.objects.create(
+            name="New Retail",
+            email="new-retail@example.com",
+            country="Test Country",
+            city="Test City",
+            street="Retail Street",
+            house_number="6",
+            node_type="retail",
+            supplier=self.retail,
+        )
+
+        self.entrepreneur.supplier = new_retail
+        with CaptureQueriesContext(connection) as queries:
+            self.entrepreneur.save()
+        # A fixed number of statements, independent of the subtree size
+        self.assertLessEqual(len(queries), 22)
+
+        for client in entrepreneurs:
+            client.refresh_from_db()
+            self.assertEqual(client.level, 4)
+            self.assertEqual(
+                client.path,
+                f"/{self.factory.pk}/{self.retail.pk}/{new_retail.pk}/"
+                f"{self.entrepreneur.pk}/",
+            )
+
+    def test_materialized_path(self):
+        """Test that the path stores the ancestor chain."""
+        self.assertEqual(self.factory.path, "/")
+        self.assertEqual(
+            self.entrepreneur.path, f"/{self.factory.pk}/{self.retail.pk}/"
+        )
+        self.assertEqual(
+            self.entrepreneur.get_ancestor_ids(),
+            [self.factory.pk, self.retail.pk],
+        )
+        self.assertEqual(
+            list(self.entrepreneur.get_ancestors()),
+            [self.factory, self.retail],
+        )
+        self.assertQuerysetEqual(
+            self.factory.get_descendants().order_by("level"),
+            [self.retail, self.entrepreneur],
+        )
+
+    def test_deep_path(self):
+        """Test that paths of deep chains are not truncated."""
+        node = self.entrepreneur
+        for i in range(100):
+            node = create_node(f"Reseller {i}", "entrepreneur", node)
+        node.refresh_from_db()
+
+        self.assertGreater(len(node.path), 255)
+        self.assertEqual(node.level, 102)
+        self.assertEqual(len(node.get_ancestor_ids()), 102)
+        self.assertEqual(self.factory.get_descendants().count(), 102)
+
+    def test_delete_reroots_clients(self):
+        """Test that deleting a supplier turns its clients into roots."""
+        self.retail.delete()
+        self.entrepreneur.refresh_from_db()
+
+        self.assertIsNone(self.entrepreneur.supplier)
+        self.assertEqual(self.entrepreneur.path, "/")
+        self.assertEqual(self.entrepreneur.level, 0)
+        self.assertFalse(self.factory.get_descendants().exists())
+
 
 class ProductModelTests(TestCase):
     """Tests for the Product model."""
@@ -140,3 +225,152 @@ class ProductModelTests(TestCase):
         # Check the reverse relationship
         self.assertEqual(self.node.products.count(), 1)
         self.assertEqual(self.node.products.first(), self.product)
+
+
+class NetworkStatisticTests(TestCase):
+    """Tests for the incrementally maintained statistics rollups."""
+
+    def setUp(self):
+        """Set up a small hierarchy."""
+        self.factory = NetworkNode.objects.create(
+            name="Factory",
+            email="factory@example.com",
+            country="Country A",
+            city="City",
+            street="Street",
+            house_number="1",
+            node_type="factory",
+        )
+        self.retail = NetworkNode.objects.create(
+            name="Retail",
+            email="retail@example.com",
+            country="Country B",
+            city="City",
+            street="Street",
+            house_number="2",
+            node_type="retail",
+            supplier=self.factory,
+            debt=Decimal("100.50"),
+        )
+        self.entrepreneur = NetworkNode.objects.create(
+            name="Entrepreneur",
+            email="entrepreneur@example.com",
+            country="Country B",
+            city="City",
+            street="Street",
+            house_number="3",
+            node_type="entrepreneur",
+            supplier=self.retail,
+            debt=Decimal("20"),
+        )
+
+    def assertRollupsMatchLive(self):
+        self.assertEqual(
+            NetworkStatistic.stored_rows(),
+            {key: value for key, value in NetworkStatistic.live_rows().items()
+             if value[0]},
+        )
+
+    def test_rollups_follow_writes(self):
+        """Test rollups after create, update, re-parent and delete."""
+        self.assertRollupsMatchLive()
+
+        self.retail.debt = Decimal("10")
+        self.retail.country = "Country C"
+        self.retail.save()
+        self.assertRollupsMatchLive()
+
+        self.retail.supplier = None
+        self.retail.node_type = "retail"
+        self.retail.save()
+        self.assertRollupsMatchLive()
+
+        self.retail.delete()
+        self.assertRollupsMatchLive()
+
+    def test_rebuild(self):
+        """Test that a rebuild restores drifted rollups."""
+        NetworkStatistic.objects.all().update(node_count=0)
+        NetworkStatistic.rebuild()
+        self.assertRollupsMatchLive()
+
+
+class SubtreeRollupTests(TestCase):
+    """Tests for the subtree debt and count rollups."""
+
+    def setUp(self):
+        """Set up factory -> retail -> two entrepreneurs."""
+        self.factory = create_node("Factory", "factory")
+        self.retail = create_node("Retail", "retail", self.factory, 100)
+        self.first = create_node(
+            "First", "entrepreneur", self.retail, 10
+        )
+        self.second = create_node(
+            "Second", "entrepreneur", self.retail, 5
+        )
+
+    def assertSubtree(self, node, debt, count):
+        node.refresh_from_db()
+        self.assertEqual(node.subtree_debt, Decimal(debt))
+        self.assertEqual(node.subtree_count, count)
+
+    def test_rollups_on_create(self):
+        """Test that creating clients adds to every ancestor."""
+        self.assertSubtree(self.factory, 115, 4)
+        self.assertSubtree(self.retail, 115, 3)
+        self.assertSubtree(self.first, 10, 1)
+
+    def test_rollups_on_debt_change(self):
+        """Test that a debt change propagates along the ancestor path."""
+        self.first.debt = Decimal("30")
+        self.first.save()
+        self.assertSubtree(self.factory, 135, 4)
+        self.assertSubtree(self.retail, 135, 3)
+
+    def test_rollups_on_reparent(self):
+        """Test that a moved subtree leaves old and joins new ancestors."""
+        other = create_node("Other Factory", "factory")
+        self.retail.supplier = other
+        self.retail.save()
+        self.assertSubtree(self.factory, 0, 1)
+        self.assertSubtree(other, 115, 4)
+
+        self.first.supplier = other
+        self.first.save()
+        self.assertSubtree(other, 115, 4)
+        self.assertSubtree(self.retail, 105, 2)
+
+    def test_rollups_on_delete(self):
+        """Test that deleting a node removes its subtree from ancestors."""
+        self.retail.delete()
+        self.assertSubtree(self.factory, 0, 1)
+        self.assertSubtree(self.first, 10, 1)
+
+    def test_save_uses_current_supplier_path(self):
+        """Test that a stale supplier object does not place a client."""
+        stale_retail = NetworkNode.objects.get(pk=self.retail.pk)
+        other = create_node("Other Factory", "factory")
+        self.retail.supplier = other
+        self.retail.save()
+
+        client = create_node("Client", "entrepreneur", stale_retail, 7)
+        self.assertEqual(client.path, f"/{other.pk}/{self.retail.pk}/")
+        self.assertEqual(client.level, 2)
+        self.assertSubtree(self.factory, 0, 1)
+        self.assertSubtree(other, 122, 5)
+
+    def test_cross_moves_cannot_store_cycle(self):
+        """Test that the cycle check runs against the locked paths."""
+        stale_first = NetworkNode.objects.get(pk=self.first.pk)
+        stale_second = NetworkNode.objects.get(pk=self.second.pk)
+        self.first.supplier = stale_second
+        self.first.save()
+
+        stale_second.supplier = stale_first
+        with self.assertRaisesMessage(
+            ValidationError, "Circular reference detected."
+        ):
+            stale_second.save()
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.supplier_id, self.retail.pk)
+        self.assertSubtree(self.retail, 115, 3)
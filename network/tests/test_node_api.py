@@ -0,0 +1,305 @@
+import json
+from datetime import date
+
+from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APIClient
+from network.admin import NetworkNodeAdmin
+from network.coalescing import flight
+from network.models import NetworkNode, Product
+from network.tests import admin_request, create_node
+
+
+class NetworkNodeHierarchyAPITests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        # factory -> retail -> entrepreneur -> sub-entrepreneur
+        self.factory = create_node("Factory", "factory")
+        self.retail = create_node("Retail", "retail", self.factory)
+        self.entrepreneur = create_node(
+            "Entrepreneur", "entrepreneur", self.retail
+        )
+        self.sub_entrepreneur = create_node(
+            "Sub Entrepreneur", "entrepreneur", self.entrepreneur
+        )
+
+    def names(self, response):
+        return [node["name"] for node in response.data["results"]]
+
+    def test_ancestors(self):
+        """Test retrieving the supply chain above a node"""
+        url = reverse("networknode-ancestors",
+                      args=[self.entrepreneur.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.names(response), ["Factory", "Retail"])
+
+    def test_descendants(self):
+        """Test retrieving all clients below a node"""
+        url = reverse("networknode-descendants", args=[self.retail.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(
+            self.names(response), ["Entrepreneur", "Sub Entrepreneur"]
+        )
+
+    def test_subtree_with_depth(self):
+        """Test limiting the subtree depth"""
+        url = reverse("networknode-subtree", args=[self.factory.id])
+        response = self.client.get(url, {"depth": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.names(response), ["Factory", "Retail"])
+
+        response = self.client.get(url)
+        self.assertEqual(response.data["count"], 4)
+
+    def test_filter_and_order_by_subtree_debt(self):
+        """Test filtering and ordering the list by subtree debt"""
+        self.sub_entrepreneur.debt = 40
+        self.sub_entrepreneur.save()
+
+        response = self.client.get(
+            reverse("networknode-list"),
+            {"subtree_debt__gte": 40, "ordering": "subtree_count"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [node["name"] for node in response.data["results"]],
+            ["Sub Entrepreneur", "Entrepreneur", "Retail", "Factory"],
+        )
+
+    def test_export_filtered_nodes(self):
+        """Test streaming filtered nodes as NDJSON"""
+        response = self.client.get(
+            reverse("networknode-export"), {"node_type": "entrepreneur"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            [row["name"] for row in rows],
+            ["Entrepreneur", "Sub Entrepreneur"],
+        )
+        self.assertEqual(rows[0]["supplier"], self.retail.id)
+
+    def test_batch_lookup(self):
+        """Test resolving several nodes by id with one query"""
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse("networknode-batch"),
+                {"ids": f"{self.retail.id},{self.factory.id}"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [node["name"] for node in response.data["results"]],
+            ["Retail", "Factory"],
+        )
+        self.assertEqual(response.data["missing"], [])
+
+    def test_detail_query_count_is_fixed(self):
+        """Test that node details do not issue a query per product"""
+        for i in range(20):
+            product = Product.objects.create(
+                name=f"Product {i}",
+                model="Model",
+                release_date=date(2024, 1, 1),
+            )
+            product.nodes.add(self.retail, self.factory)
+
+        url = reverse("networknode-detail", args=[self.retail.id])
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["supplier_details"]["name"], "Factory")
+        self.assertEqual(len(response.data["products"]), 20)
+        self.assertEqual(
+            sorted(node["name"]
+                   for node in response.data["products"][0]["nodes"]),
+            ["Factory", "Retail"],
+        )
+
+    def test_sparse_fieldset_list(self):
+        """Test that ?fields= trims the response and the selected columns"""
+        params = {"fields": "id,name,city", "page_size": 2}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("networknode-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(response.data["results"][0]), {"id", "name", "city"}
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("email", queries[0]["sql"])
+
+        # The cursor columns are loaded although they are not rendered
+        with self.assertNumQueries(1):
+            response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_sparse_fieldset_detail_skips_relations(self):
+        """Test that excluded relations are not loaded"""
+        url = reverse("networknode-detail", args=[self.retail.id])
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                url, {"exclude": "products,supplier_details"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("products", response.data)
+        self.assertEqual(response.data["supplier"], self.factory.id)
+
+    def test_sparse_fieldset_unknown_field(self):
+        """Test that unknown field names are rejected"""
+        response = self.client.get(
+            reverse("networknode-list"), {"fields": "id,password"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", response.data)
+
+    def test_subtree_invalid_depth(self):
+        """Test that a negative depth is rejected"""
+        url = reverse("networknode-subtree", args=[self.factory.id])
+        response = self.client.get(url, {"depth": "-1"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class NetworkNodeTreeAPITests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("networknode-tree")
+        cache.clear()
+
+        self.factory = NetworkNode.objects.create(
+            name="Factory",
+            email="factory@example.com",
+            country="Test Country",
+            city="Test City",
+            street="Test Street",
+            house_number="1",
+            node_type="factory",
+        )
+        self.retail = NetworkNode.objects.create(
+            name="Retail",
+            email="retail@example.com",
+            country="Test Country",
+            city="Test City",
+            street="Test Street",
+            house_number="2",
+            node_type="retail",
+            supplier=self.factory,
+            debt=150,
+        )
+
+    def test_tree_structure(self):
+        """Test that the tree nests clients under their suppliers"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        factory = response.data[0]
+        self.assertEqual(factory["name"], "Factory")
+        self.assertEqual(factory["clients"][0]["name"], "Retail")
+        self.assertEqual(factory["clients"][0]["debt"], "150.00")
+
+    def test_tree_cached_until_node_write(self):
+        """Test that the cached tree is invalidated by node writes"""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.retail.name = "Renamed Retail"
+            self.retail.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response.data[0]["clients"][0]["name"], "Renamed Retail"
+        )
+
+
+class NetworkNodeStatisticsAPITests(TestCase):
+    """Tests that the statistics endpoint matches the node table."""
+
+    def setUp(self):
+        flight.reset()
+        self.user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="x"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("networknode-statistics")
+
+        self.factory = create_node("Factory", "factory")
+        self.retail = create_node("Retail", "retail", self.factory, debt=200)
+        self.shop = create_node(
+            "Shop", "entrepreneur", self.retail, debt=50, country="KZ"
+        )
+
+    def checked_statistics(self):
+        """Fetch the statistics and compare them with live aggregates."""
+        flight.reset()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        nodes = NetworkNode.objects.order_by()
+        totals = nodes.aggregate(count=Count("id"), debt=Sum("debt"))
+        self.assertEqual(response.data["total_nodes"], totals["count"])
+        self.assertEqual(response.data["total_debt"], totals["debt"] or 0)
+        self.assertEqual(
+            response.data["nodes_by_level"],
+            dict(nodes.values_list("level").annotate(Count("id"))),
+        )
+        self.assertEqual(
+            response.data["nodes_by_country"],
+            dict(nodes.values_list("country").annotate(Count("id"))),
+        )
+        return response.data
+
+    def test_statistics_follow_writes(self):
+        """Test the statistics after creates, moves and deletes"""
+        stats = self.checked_statistics()
+        self.assertEqual(stats["nodes_by_level"], {0: 1, 1: 1, 2: 1})
+
+        other = create_node("Other", "factory", country="KZ")
+        self.checked_statistics()
+
+        self.shop.supplier = other
+        self.shop.save()
+        self.checked_statistics()
+
+        self.retail.supplier = None
+        self.retail.save()
+        self.checked_statistics()
+
+        other.delete()
+        self.checked_statistics()
+
+    def test_statistics_after_clearing_debt(self):
+        """Test the statistics after both ways of clearing debt"""
+        response = self.client.post(
+            reverse("networknode-clear-debt", args=[self.shop.pk])
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.checked_statistics()
+
+        admin = NetworkNodeAdmin(NetworkNode, AdminSite())
+        admin.clear_debt(
+            admin_request(self.user), NetworkNode.objects.all()
+        )
+        self.assertEqual(self.checked_statistics()["total_debt"], 0)
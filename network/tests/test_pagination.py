@@ -0,0 +1,127 @@
+from datetime import date
+from unittest import mock
+
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from django.test import TestCase
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from network.models import Product
+from network.pagination import (
+    EstimatedCountPagination,
+    EstimatedCountPaginator,
+    ProductCursorPagination,
+    estimate_count,
+)
+
+
+class EstimatedCountPaginationTests(TestCase):
+    """Tests for the opt-in estimated count pagination."""
+
+    def setUp(self):
+        Product.objects.bulk_create(
+            Product(
+                name=f"Product {i}",
+                model="Model",
+                release_date=date(2024, 1, 1),
+            )
+            for i in range(15)
+        )
+        self.queryset = Product.objects.order_by("id")
+        self.request = Request(APIRequestFactory().get("/api/products/"))
+
+    def paginate(self, request=None):
+        paginator = EstimatedCountPagination()
+        page = paginator.paginate_queryset(
+            self.queryset, request or self.request
+        )
+        return paginator.get_paginated_response([p.id for p in page]).data
+
+    def page_request(self, number):
+        return Request(
+            APIRequestFactory().get("/api/products/", {"page": number})
+        )
+
+    def test_exact_count_without_estimate(self):
+        """Test the exact count when the backend has no estimate."""
+        self.assertIsNone(estimate_count(self.queryset))
+        data = self.paginate()
+        self.assertEqual(data["count"], 15)
+        self.assertFalse(data["count_is_approximate"])
+
+    def test_estimate_used_above_threshold(self):
+        """Test that a large estimate replaces the exact count."""
+        with mock.patch(
+            "network.pagination.estimate_count", return_value=2_000_000
+        ):
+            data = self.paginate()
+        self.assertEqual(data["count"], 2_000_000)
+        self.assertTrue(data["count_is_approximate"])
+        self.assertEqual(len(data["results"]), 10)
+
+    def test_overestimate_does_not_invent_pages(self):
+        """Test that next links follow the rows, not the estimate."""
+        with mock.patch(
+            "network.pagination.estimate_count", return_value=20_000
+        ):
+            self.assertIsNotNone(self.paginate()["next"])
+            data = self.paginate(self.page_request(2))
+            self.assertEqual(len(data["results"]), 5)
+            self.assertIsNone(data["next"])
+            with self.assertRaises(NotFound):
+                self.paginate(self.page_request(50))
+
+    def test_underestimate_serves_trailing_pages(self):
+        """Test that pages past the estimated count are still served."""
+        with mock.patch(
+            "network.pagination.estimate_count", return_value=5
+        ), mock.patch.object(
+            EstimatedCountPaginator, "exact_count_threshold", 5
+        ):
+            data = self.paginate(self.page_request(2))
+        self.assertEqual(data["count"], 5)
+        self.assertEqual(len(data["results"]), 5)
+        self.assertIsNotNone(data["previous"])
+
+    def test_exact_count_below_threshold(self):
+        """Test that small estimates fall back to the exact count."""
+        with mock.patch("network.pagination.estimate_count", return_value=9):
+            data = self.paginate()
+        self.assertEqual(data["count"], 15)
+        self.assertFalse(data["count_is_approximate"])
+
+
+class AnnotatedKeysetPaginationTests(TestCase):
+    """Tests for keyset pages ordered by an annotation, like search rank."""
+
+    def setUp(self):
+        Product.objects.bulk_create(
+            Product(
+                name=f"Product {i}",
+                model="Model",
+                release_date=date(2024, 1, 1),
+                quantity=i % 4,
+            )
+            for i in range(12)
+        )
+        self.queryset = Product.objects.annotate(
+            search_rank=Cast(F("quantity"), FloatField())
+        ).order_by("-search_rank")
+
+    def test_pages_follow_annotation(self):
+        """Test that cursors keep the annotation order across pages."""
+        factory = APIRequestFactory()
+        url, seen = "/api/products/?page_size=5", []
+        while url:
+            paginator = ProductCursorPagination()
+            request = Request(factory.get(url))
+            page = paginator.paginate_queryset(self.queryset, request)
+            self.assertEqual(
+                paginator.keyset, ["-search_rank", "-id"]
+            )
+            seen.extend(page)
+            url = paginator.get_next_link()
+        expected = list(self.queryset.order_by("-search_rank", "-id"))
+        self.assertEqual(seen, expected)
@@ -1,3 +1,8 @@
+import csv
+import json
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth.models import User
@@ -67,8 +72,8 @@ class ProductAPITests(TestCase):
         """Test retrieving all products"""
         response = self.client.get(self.products_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["name"], "Test Product")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["name"], "Test Product")
 
     def test_get_product_detail(self):
         """Test retrieving a single product"""
@@ -120,3 +125,213 @@ class ProductAPITests(TestCase):
         response = self.client.delete(self.product_detail_url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Product.objects.count(), 0)
+
+    def test_cursor_pagination(self):
+        """Test walking products page by page with equal sort keys"""
+        for i in range(4):
+            Product.objects.create(
+                name=f"Product {i}",
+                model="Same Model",
+                release_date=date(2024, 1, 1),
+                price=50,
+            )
+
+        seen = []
+        url = f"{self.products_url}?ordering=price&page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            seen.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+
+        expected = list(
+            Product.objects.order_by("price", "id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual(seen, expected)
+
+        response = self.client.get(
+            f"{self.products_url}?ordering=price&page_size=2"
+        )
+        response = self.client.get(response.data["next"])
+        response = self.client.get(response.data["previous"])
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], expected[:2]
+        )
+        self.assertIsNone(response.data["previous"])
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get(self.products_url, {"cursor": "broken"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_sparse_fieldset_skips_nodes(self):
+        """Test that leaving out nodes skips their prefetch"""
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.products_url, {"fields": "id,name"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [{"id": self.product.id, "name": "Test Product"}],
+        )
+
+        response = self.client.get(self.products_url, {"exclude": "price"})
+        self.assertNotIn("price", response.data["results"][0])
+        self.assertEqual(
+            response.data["results"][0]["nodes"][0]["name"], "Test Factory"
+        )
+
+    def test_search_fallback(self):
+        """Test that search matches substrings off PostgreSQL"""
+        Product.objects.create(
+            name="Other", model="Phone X", release_date=date.today()
+        )
+        response = self.client.get(self.products_url, {"search": "phone"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["name"] for item in response.data["results"]], ["Other"]
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "Needs full-text search")
+    def test_search_ranked(self):
+        """Test that full-text matches come ordered by relevance"""
+        Product.objects.create(
+            name="Case", model="Phone case", release_date=date.today()
+        )
+        Product.objects.create(
+            name="Phone", model="Phone X", release_date=date.today()
+        )
+        response = self.client.get(self.products_url, {"search": "phone"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["name"] for item in response.data["results"]],
+            ["Phone", "Case"],
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "Needs pg_trgm")
+    def test_search_similar_words(self):
+        """Test that trigram similarity matches words off by a letter"""
+        Product.objects.create(
+            name="Phone", model="X", release_date=date.today()
+        )
+        response = self.client.get(self.products_url, {"search": "phones"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["name"] for item in response.data["results"]], ["Phone"]
+        )
+
+    def test_export_ndjson(self):
+        """Test streaming products with their node ids as NDJSON"""
+        self.product.nodes.add(self.node1)
+        response = self.client.get(
+            reverse("product-export"), {"model": "Test Model"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual(row["name"], "Test Product")
+        self.assertEqual(row["price"], "100.00")
+        self.assertEqual(
+            row["nodes"], sorted([self.factory_node.id, self.node1.id])
+        )
+
+    def test_export_csv(self):
+        """Test streaming products as CSV"""
+        response = self.client.get(
+            reverse("product-export"), {"export_format": "csv"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.reader(
+            b"".join(response.streaming_content).decode().splitlines()
+        ))
+        self.assertEqual(
+            rows[0],
+            ["id", "name", "model", "release_date", "price", "quantity",
+             "nodes"],
+        )
+        self.assertEqual(rows[1][-1], str(self.factory_node.id))
+
+    def test_export_unknown_format(self):
+        """Test that unknown export formats are rejected"""
+        response = self.client.get(
+            reverse("product-export"), {"export_format": "xml"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_upsert(self):
+        """Test creating and updating products in one request"""
+        response = self.client.post(
+            reverse("product-bulk-upsert"),
+            [
+                {
+                    "name": "New Product",
+                    "model": "NP-1",
+                    "release_date": "2024-01-01",
+                    "price": "10.00",
+                    "nodes": [self.node1.id, self.node2.id],
+                },
+                {
+                    "id": self.product.id,
+                    "name": "Renamed Product",
+                    "model": "Test Model",
+                    "release_date": "2024-02-01",
+                    "nodes": [self.node2.id],
+                },
+                {
+                    "name": "Broken Product",
+                    "model": "BP-1",
+                    "release_date": "2024-01-01",
+                    "nodes": [999999],
+                },
+                {"name": "Missing Fields"},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], [self.product.id])
+        self.assertEqual(len(response.data["created"]), 1)
+        self.assertEqual(
+            [error["index"] for error in response.data["errors"]], [3, 2]
+        )
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.name, "Renamed Product")
+        self.assertEqual(self.product.quantity, 10)
+        self.assertEqual(list(self.product.nodes.all()), [self.node2])
+        created = Product.objects.get(pk=response.data["created"][0])
+        self.assertEqual(created.nodes.count(), 2)
+
+    def test_batch_lookup(self):
+        """Test resolving several products by id in input order"""
+        other = Product.objects.create(
+            name="Other Product",
+            model="Other Model",
+            release_date=date.today(),
+        )
+        other.nodes.add(self.node1)
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("product-batch"),
+                {"ids": f"{other.id},999999,{self.product.id}"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [other.id, self.product.id],
+        )
+        self.assertEqual(response.data["missing"], [999999])
+        self.assertEqual(
+            response.data["results"][0]["nodes"],
+            [{"id": self.node1.id, "name": "Node 1"}],
+        )
+
+    def test_batch_lookup_invalid_ids(self):
+        """Test that non-integer ids are rejected"""
+        response = self.client.get(reverse("product-batch"), {"ids": "1,a"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
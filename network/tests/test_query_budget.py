@@ -0,0 +1,133 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from network.models import NetworkNode, Product
+from network.query_budget import QueryBudgetExceeded
+from network.views import NetworkNodeViewSet
+
+
+@override_settings(
+    NETWORK_QUERY_BUDGET_RAISE=True, NETWORK_QUERY_BUDGET_OVERHEAD=0
+)
+class QueryBudgetTests(TestCase):
+    """Requests every budgeted endpoint against 10 nodes and products."""
+
+    size = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        cls.factory = NetworkNode.objects.create(
+            name="Factory",
+            email="factory@example.com",
+            country="Country",
+            city="City",
+            street="Street",
+            house_number="1",
+            node_type="factory",
+        )
+        NetworkNode.objects.bulk_create(
+            NetworkNode(
+                name=f"Retail {i}",
+                email=f"retail{i}@example.com",
+                country=f"Country {i % 7}",
+                city="City",
+                street="Street",
+                house_number=str(i),
+                node_type="retail",
+                supplier=cls.factory,
+                path=cls.factory.get_descendants_path(),
+                level=1,
+            )
+            for i in range(cls.size)
+        )
+        products = Product.objects.bulk_create(
+            Product(
+                name=f"Product {i}",
+                model=f"Model {i % 5}",
+                release_date=date(2024, 1, 1),
+            )
+            for i in range(cls.size)
+        )
+        Product.nodes.through.objects.bulk_create(
+            Product.nodes.through(
+                product_id=product.pk, networknode_id=cls.factory.pk
+            )
+            for product in products
+        )
+        cls.product = products[0]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def assertWithinBudget(self, url, params=None):
+        response = self.client.get(url, params or {"page_size": 100})
+        self.assertEqual(response.status_code, 200)
+
+    def test_node_list(self):
+        self.assertWithinBudget(reverse("networknode-list"))
+
+    def test_node_retrieve(self):
+        self.assertWithinBudget(
+            reverse("networknode-detail", args=[self.factory.pk])
+        )
+
+    def test_node_hierarchy(self):
+        for name in ("ancestors", "descendants", "subtree"):
+            self.assertWithinBudget(
+                reverse(f"networknode-{name}", args=[self.factory.pk])
+            )
+
+    def test_node_statistics(self):
+        self.assertWithinBudget(reverse("networknode-statistics"))
+
+    def test_node_tree(self):
+        self.assertWithinBudget(reverse("networknode-tree"))
+
+    def test_product_list(self):
+        self.assertWithinBudget(reverse("product-list"))
+
+    def test_product_retrieve(self):
+        self.assertWithinBudget(
+            reverse("product-detail", args=[self.product.pk])
+        )
+
+    def test_product_batch(self):
+        ids = Product.objects.values_list("pk", flat=True)[:100]
+        self.assertWithinBudget(
+            reverse("product-batch"),
+            {"ids": ",".join(str(pk) for pk in ids)},
+        )
+
+
+class LargeNetworkQueryBudgetTests(QueryBudgetTests):
+    """Query budgets with 10,000 nodes and products."""
+
+    size = 10000
+
+
+@override_settings(NETWORK_QUERY_BUDGET_RAISE=True)
+class QueryBudgetMiddlewareTests(TestCase):
+    """Tests for budget enforcement by the middleware."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            user=User.objects.create_user(username="testuser")
+        )
+
+    def test_exceeded_budget_raises(self):
+        """Test that an action over budget raises in strict mode."""
+        with mock.patch.object(
+            NetworkNodeViewSet, "query_budgets", {"list": -5}
+        ):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse("networknode-list"))
@@ -0,0 +1,115 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+import msgpack
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from network.models import NetworkNode, Product
+from network.renderers import (
+    MessagePackParser,
+    MessagePackRenderer,
+    ORJSONParser,
+    ORJSONRenderer,
+)
+
+
+class RendererTests(TestCase):
+    """Tests for the orjson and MessagePack renderers and parsers."""
+
+    data = {
+        "price": Decimal("1234.50"),
+        "created_at": datetime.datetime(
+            2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc
+        ),
+        "naive": datetime.datetime(2024, 5, 1, 12, 30),
+        "release_date": datetime.date(2024, 5, 1),
+        "uuid": uuid.UUID(int=1),
+        "name": "Завод №1",
+        "nodes": [{"id": 1, "name": "A"}, (2, None)],
+        3: True,
+    }
+
+    def test_json_matches_drf(self):
+        """Test that orjson output is byte-identical to JSONRenderer"""
+        self.assertEqual(
+            ORJSONRenderer().render(self.data),
+            JSONRenderer().render(self.data),
+        )
+
+    def test_indented_json_falls_back(self):
+        """Test that indented output keeps the stdlib formatting"""
+        media_type = "application/json; indent=4"
+        self.assertEqual(
+            ORJSONRenderer().render(self.data, media_type),
+            JSONRenderer().render(self.data, media_type),
+        )
+
+    def test_json_parser(self):
+        """Test parsing and rejecting malformed JSON"""
+        parser = ORJSONParser()
+        self.assertEqual(
+            parser.parse(io.BytesIO(b'{"debt": "1.50", "ids": [1, 2]}')),
+            {"debt": "1.50", "ids": [1, 2]},
+        )
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b"{broken"))
+
+    def test_msgpack_round_trip(self):
+        """Test that MessagePack converts values like the JSON renderer"""
+        data = {key: value for key, value in self.data.items() if key != 3}
+        content = MessagePackRenderer().render(data)
+        parsed = MessagePackParser().parse(io.BytesIO(content))
+        self.assertEqual(parsed["price"], 1234.5)
+        self.assertEqual(parsed["created_at"], "2024-05-01T12:30:15.123456Z")
+        self.assertEqual(parsed["nodes"], [{"id": 1, "name": "A"}, [2, None]])
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(io.BytesIO(b"\xc1"))
+
+
+class ContentNegotiationTests(TestCase):
+    """Tests for choosing the format through content negotiation."""
+
+    def setUp(self):
+        user = User.objects.create_user(username="testuser", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+        self.url = reverse("product-list")
+        self.node = NetworkNode.objects.create(
+            name="Factory", email="factory@example.com", country="RU",
+            city="Moscow", street="Street", house_number="1",
+            node_type="factory",
+        )
+
+    def test_msgpack_request_and_response(self):
+        """Test creating and listing products as MessagePack"""
+        body = msgpack.packb({
+            "name": "Phone",
+            "model": "X",
+            "release_date": "2024-05-01",
+            "price": "99.90",
+            "nodes": [self.node.id],
+        })
+        response = self.client.post(
+            self.url, body, content_type="application/msgpack",
+            HTTP_ACCEPT="application/msgpack",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content)["price"], "99.90")
+        self.assertTrue(Product.objects.filter(name="Phone").exists())
+
+        response = self.client.get(self.url, {"format": "msgpack"})
+        results = msgpack.unpackb(response.content)["results"]
+        self.assertEqual([item["name"] for item in results], ["Phone"])
+
+    def test_json_by_default(self):
+        """Test that JSON stays the default format"""
+        response = self.client.get(self.url)
+        self.assertEqual(response["Content-Type"], "application/json")
@@ -0,0 +1,151 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from network.coalescing import flight
+from network.models import DebtLedgerEntry, NetworkNode
+from network.reports import build_debt_report
+from network.tests import create_node
+
+
+class DebtReportTests(TestCase):
+    """Tests for the debt concentration report."""
+
+    def setUp(self):
+        cache.clear()
+        flight.reset()
+        user = User.objects.create_user(username="testuser", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+        self.url = reverse("networknode-debt-report")
+
+        self.factory = create_node("Factory", "factory")
+        self.other = create_node("Other", "factory", country="KZ")
+        self.retail = create_node(
+            "Retail", "retail", self.factory, debt=600
+        )
+        self.shop = create_node(
+            "Shop", "entrepreneur", self.retail, debt=300
+        )
+        self.store = create_node(
+            "Store", "retail", self.other, debt=100, country="KZ"
+        )
+
+    def test_report_in_one_query(self):
+        """Test all breakdowns computed with a single statement"""
+        with self.assertNumQueries(1):
+            report = build_debt_report(top=2)
+
+        self.assertEqual(
+            report["total"], {"node_count": 5, "total_debt": "1000.00"}
+        )
+        self.assertEqual(
+            [(item["rank"], item["supplier"], item["name"],
+              item["client_count"], item["total_debt"], item["share"])
+             for item in report["by_supplier"]],
+            [
+                (1, self.factory.id, "Factory", 1, "600.00", 0.6),
+                (2, self.retail.id, "Retail", 1, "300.00", 0.3),
+            ],
+        )
+        self.assertEqual(
+            [(item["id"], item["name"], item["debt"])
+             for item in report["top_debtors"]],
+            [(self.retail.id, "Retail", "600.00"),
+             (self.shop.id, "Shop", "300.00")],
+        )
+        self.assertEqual(report["by_node_type"], [
+            {"node_type": "retail", "node_count": 2,
+             "total_debt": "700.00", "share": 0.7},
+            {"node_type": "entrepreneur", "node_count": 1,
+             "total_debt": "300.00", "share": 0.3},
+            {"node_type": "factory", "node_count": 2,
+             "total_debt": "0.00", "share": 0.0},
+        ])
+        self.assertEqual(
+            [(item["country"], item["total_debt"])
+             for item in report["by_country"]],
+            [("RU", "900.00"), ("KZ", "100.00")],
+        )
+        self.assertEqual(
+            report["by_node_type_and_country"][0],
+            {"node_type": "retail", "country": "RU", "node_count": 1,
+             "total_debt": "600.00", "share": 0.6},
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "Needs GROUPING SETS")
+    def test_grouping_sets_match_union_all(self):
+        """Test that both groupings produce the same report"""
+        create_node("Kiosk", "entrepreneur", self.retail, debt=300)
+        create_node("Stall", "entrepreneur", self.store, country="KZ")
+
+        grouped = build_debt_report(top=3, grouping_sets=True)
+        union = build_debt_report(top=3, grouping_sets=False)
+
+        del grouped["generated_at"], union["generated_at"]
+        self.assertEqual(grouped, union)
+        self.assertEqual(len(grouped["by_node_type_and_country"]), 6)
+
+    def test_aging_of_outstanding_debt(self):
+        """Test that payments settle the oldest debt first"""
+        now = timezone.now()
+        DebtLedgerEntry.objects.update(created_at=now - timedelta(days=100))
+        self.shop.debt_entries.update(created_at=now - timedelta(days=45))
+        NetworkNode.change_debts({self.retail.pk: 200}, DebtLedgerEntry.CHARGE)
+        NetworkNode.change_debts(
+            {self.retail.pk: -300}, DebtLedgerEntry.PAYMENT
+        )
+
+        with self.assertNumQueries(1):
+            report = build_debt_report()
+        self.assertEqual(report["total"]["total_debt"], "900.00")
+        self.assertEqual(
+            [(item["bucket"], item["node_count"], item["total_debt"])
+             for item in report["aging"]],
+            [("0-30", 1, "200.00"), ("31-60", 1, "300.00"),
+             ("61-90", 0, "0.00"), ("91+", 2, "400.00")],
+        )
+        self.assertAlmostEqual(report["aging"][3]["share"], 400 / 900)
+
+    def test_empty_network(self):
+        """Test the report without any nodes"""
+        NetworkNode.objects.all().delete()
+        report = build_debt_report()
+        self.assertEqual(
+            report["total"], {"node_count": 0, "total_debt": "0.00"}
+        )
+        self.assertEqual(report["by_supplier"], [])
+        self.assertEqual(report["top_debtors"], [])
+        self.assertEqual(
+            [item["total_debt"] for item in report["aging"]], ["0.00"] * 4
+        )
+
+    @override_settings(NETWORK_DEBT_REPORT_CACHE_TIMEOUT=60)
+    def test_endpoint_cached_for_interval(self):
+        """Test that the report is reused until the interval ends"""
+        response = self.client.get(self.url, {"top": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["by_supplier"]), 1)
+
+        flight.reset()
+        self.retail.debt = 0
+        self.retail.save()
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url, {"top": 1})
+        self.assertEqual(cached.data, response.data)
+
+    def test_invalid_top(self):
+        """Test that the ranking size is validated"""
+        for top in ("0", "101", "x"):
+            response = self.client.get(self.url, {"top": top})
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
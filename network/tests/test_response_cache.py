@@ -0,0 +1,114 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from network.checks import check_shared_cache
+from network.models import NetworkNode, Product
+from network.response_cache import STATUS_HEADER
+
+
+@override_settings(NETWORK_RESPONSE_CACHE_TIMEOUT=60)
+class ResponseCacheTests(TestCase):
+    """Tests for the write-invalidated list and detail response cache."""
+
+    def setUp(self):
+        cache.clear()
+        caches["responses"].clear()
+        self.user = User.objects.create_user(
+            username="staff", password="x", is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.node = NetworkNode.objects.create(
+            name="Factory", email="factory@example.com", country="RU",
+            city="Moscow", street="Street", house_number="1",
+            node_type="factory",
+        )
+        self.product = Product.objects.create(
+            name="Phone", model="X", release_date=date(2024, 1, 1)
+        )
+        self.url = reverse("product-list")
+
+    def test_hit_without_queries(self):
+        """Test that a repeated request is served from the cache"""
+        first = self.client.get(self.url, {"model": "X", "page_size": 5})
+        self.assertEqual(first[STATUS_HEADER], "MISS")
+        with self.assertNumQueries(0):
+            second = self.client.get(
+                f"{self.url}?page_size=5&model=X"
+            )
+        self.assertEqual(second[STATUS_HEADER], "HIT")
+        self.assertEqual(second.content, first.content)
+
+    def test_invalidated_by_writes(self):
+        """Test that model writes and M2M changes invalidate responses"""
+        detail_url = reverse("product-detail", args=[self.product.id])
+        self.client.get(detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.nodes.add(self.node)
+        response = self.client.get(detail_url)
+        self.assertEqual(response[STATUS_HEADER], "MISS")
+        self.assertEqual(response.data["nodes"][0]["name"], "Factory")
+
+        # Product responses embed node names
+        with self.captureOnCommitCallbacks(execute=True):
+            self.node.name = "Renamed"
+            self.node.save()
+        response = self.client.get(detail_url)
+        self.assertEqual(response[STATUS_HEADER], "MISS")
+        self.assertEqual(response.data["nodes"][0]["name"], "Renamed")
+
+    def test_stats(self):
+        """Test the hit ratio and invalidation counters"""
+        self.client.get(self.url)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(
+                name="Tablet", model="Y", release_date=date(2024, 1, 1)
+            )
+
+        response = self.client.get(reverse("networknode-cache-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["hits"], 1)
+        self.assertEqual(response.data["misses"], 1)
+        self.assertEqual(response.data["hit_ratio"], 0.5)
+        self.assertEqual(response.data["invalidations"]["network.Product"], 1)
+        self.assertEqual(
+            set(response.data["coalescing"]), {"hit", "miss", "coalesced"}
+        )
+
+    def test_stats_require_staff(self):
+        """Test that cache statistics are hidden from regular users"""
+        self.client.force_authenticate(
+            user=User.objects.create_user(username="user", password="x")
+        )
+        response = self.client.get(reverse("networknode-cache-stats"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(NETWORK_RESPONSE_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        """Test that a zero timeout bypasses the cache"""
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertNotIn(STATUS_HEADER, response)
+
+    @override_settings(DEBUG=False)
+    def test_process_local_counters_warning(self):
+        """Test the system check against a process-local default cache"""
+        self.assertEqual(
+            [warning.id for warning in check_shared_cache(None)],
+            ["network.W001"],
+        )
+        with override_settings(CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": "redis://localhost:6379/0",
+            },
+        }):
+            self.assertEqual(check_shared_cache(None), [])
@@ -1,19 +1,42 @@
 # network/views.py
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions, filters, serializers, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Count
-from .models import NetworkNode, Product
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import Count, F, Prefetch, Q, Sum
+from django.db.models.functions import TruncMonth
+from .models import (
+    ChangeLog, DebtSnapshot, NetworkNode, NetworkStatistic, Product,
+)
 from .serializers import (
+    ChangeLogSerializer,
+    DebtHistoryBucketSerializer,
+    DebtHistoryQuerySerializer,
+    DebtReportQuerySerializer,
     NetworkNodeSerializer,
     ProductSerializer,
     NetworkNodeDetailSerializer,
 )
-from .pagination import StandardResultsSetPagination
+from .cache import get_network_tree
+from .coalescing import coalesce, coalescing_stats
+from .conditional import ConditionalGetMixin
+from .exports import export_response
+from .fastpath import ValuesSerializer, product_nodes
+from .importers import NodeImportError, import_nodes, upsert_products
+from .pagination import (
+    NetworkNodeCursorPagination,
+    ProductCursorPagination,
+    StandardResultsSetPagination,
+)
+from .reports import get_debt_report
+from .response_cache import CachedResponseMixin, response_cache_stats
+from .search import FullTextSearchFilter
 
 
 class IsActiveEmployee(permissions.BasePermission):
@@ -25,7 +48,148 @@ class IsActiveEmployee(permissions.BasePermission):
                 request.user.is_active)
 
 
-class NetworkNodeViewSet(viewsets.ModelViewSet):
+class BatchLookupMixin:
+    """
+    Adds a ``batch`` action resolving ``?ids=1,2,3`` with one query.
+
+    Objects are returned in the order of the requested ids, and ids that
+    do not exist are listed under ``missing``.
+    """
+
+    max_batch_size = 1000
+
+    @action(detail=False)
+    def batch(self, request):
+        """Objects for a comma separated list of ids, in input order"""
+        raw_ids = request.query_params.get("ids", "")
+        try:
+            ids = list(dict.fromkeys(
+                int(pk) for pk in raw_ids.split(",") if pk.strip()
+            ))
+        except ValueError:
+            raise serializers.ValidationError(
+                {"ids": ["A comma separated list of integers is required."]}
+            )
+        if len(ids) > self.max_batch_size:
+            raise serializers.ValidationError(
+                {"ids": [f"At most {self.max_batch_size} ids are allowed."]}
+            )
+
+        objects = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [objects[pk] for pk in ids if pk in objects], many=True
+        )
+        return Response({
+            "results": serializer.data,
+            "missing": [pk for pk in ids if pk not in objects],
+        })
+
+
+class SparseFieldsetMixin:
+    """
+    Restricts read responses with ``?fields=a,b`` or ``?exclude=a,b``.
+
+    The serializer drops the other fields and the queryset of ``list``,
+    ``retrieve`` and ``batch`` selects only the columns they still read.
+    Serializer fields reading other columns or relations are mapped to
+    them in ``sparse_field_sources``.
+    """
+
+    fields_query_param = "fields"
+    exclude_query_param = "exclude"
+    sparse_actions = ("list", "retrieve", "batch")
+    sparse_field_sources = {}
+
+    def get_sparse_fields(self):
+        """Return the serializer fields to render, or ``None`` for all."""
+        request = self.request
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return None
+        include = self._split_param(self.fields_query_param)
+        exclude = self._split_param(self.exclude_query_param)
+        if include is None and exclude is None:
+            return None
+
+        available = self.get_serializer_class().Meta.fields
+        for param, names in (
+            (self.fields_query_param, include),
+            (self.exclude_query_param, exclude),
+        ):
+            unknown = [name for name in names or () if name not in available]
+            if unknown:
+                raise serializers.ValidationError(
+                    {param: [f"Unknown fields: {', '.join(unknown)}."]}
+                )
+        return [
+            name for name in available
+            if (include is None or name in include)
+            and name not in (exclude or ())
+        ]
+
+    def wants_field(self, name):
+        """Whether the response includes the serializer field ``name``."""
+        fields = self.get_sparse_fields()
+        return fields is None or name in fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_sparse_fields()
+        if fields is None or self.action not in self.sparse_actions:
+            return queryset
+        columns = {queryset.model._meta.pk.name}
+        for name in fields:
+            for source in self.sparse_field_sources.get(name, [name]):
+                try:
+                    field = queryset.model._meta.get_field(source)
+                except FieldDoesNotExist:
+                    continue
+                if field.concrete and not field.many_to_many:
+                    columns.add(source)
+        return queryset.only(*columns)
+
+    def _split_param(self, param):
+        value = self.request.query_params.get(param)
+        if value is None:
+            return None
+        return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class FastListMixin:
+    """
+    Serves ``list`` from ``values()`` rows when the
+    ``NETWORK_FAST_LIST_SERIALIZATION`` setting is on.
+
+    The JSON is identical to the serializer output; many-to-many fields are
+    loaded by the functions in ``fast_list_related``.
+    """
+
+    fast_list_related = {}
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, "NETWORK_FAST_LIST_SERIALIZATION", False):
+            return super().list(request, *args, **kwargs)
+
+        serializer = ValuesSerializer(
+            self.get_serializer(), related=self.fast_list_related
+        )
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.prefetch_related(None).values(*serializer.fields)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(rows))
+
+
+class NetworkNodeViewSet(
+    ConditionalGetMixin, CachedResponseMixin, FastListMixin,
+    SparseFieldsetMixin, BatchLookupMixin, viewsets.ModelViewSet,
+):
     """
     ViewSet for NetworkNode model providing CRUD operations.
     Prevents updating the debt field via API.
@@ -33,50 +197,241 @@ class NetworkNodeViewSet(viewsets.ModelViewSet):
 
     queryset = NetworkNode.objects.all()
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    filterset_fields = ["country", "city", "node_type"]
+    filter_backends = [
+        DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter
+    ]
+    filterset_fields = {
+        "country": ["exact"],
+        "city": ["exact"],
+        "node_type": ["exact"],
+        "subtree_debt": ["gte", "lte"],
+        "subtree_count": ["gte", "lte"],
+    }
     search_fields = ["name", "email"]
+    sparse_field_sources = {"supplier_details": ["supplier"]}
+    cache_models = [NetworkNode, Product]
+    ordering_fields = ["debt", "subtree_debt", "subtree_count", "created_at"]
+    pagination_class = NetworkNodeCursorPagination
+    query_budgets = {
+        "list": 1,
+        "retrieve": 3,
+        "ancestors": 3,
+        "descendants": 3,
+        "subtree": 3,
+        "batch": 1,
+        "tree": 1,
+        "statistics": 1,
+        "debt_history": 1,
+        "debt_report": 1,
+        "cache_stats": 0,
+    }
+    export_fields = [
+        "id", "name", "email", "country", "city", "street", "house_number",
+        "supplier", "debt", "node_type", "level", "created_at",
+    ]
 
     def get_serializer_class(self):
         if self.action == "retrieve":
             return NetworkNodeDetailSerializer
         return NetworkNodeSerializer
 
+    def get_cache_models(self):
+        # Only node details render the products of a node
+        if self.action == "retrieve":
+            return self.cache_models
+        return [NetworkNode]
+
+    def get_queryset(self):
+        """
+        Load everything the detail serializer reads in a fixed number of
+        queries: the supplier joined, products and their nodes prefetched.
+        """
+        queryset = super().get_queryset()
+        if self.action != "retrieve":
+            return queryset
+        if self.wants_field("supplier_details"):
+            queryset = queryset.select_related("supplier")
+        if self.wants_field("products"):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "products",
+                    queryset=Product.objects.prefetch_related(Prefetch(
+                        "nodes",
+                        queryset=NetworkNode.objects.only("id", "name"),
+                    )),
+                )
+            )
+        return queryset
+
     def perform_update(self, serializer):
         """Prevent updating debt field through API"""
-        instance = self.get_object()
-        serializer.save(debt=instance.debt)
+        with transaction.atomic():
+            # Keep the current balance, not the one read by get_object()
+            debt = NetworkNode.objects.select_for_update().values_list(
+                "debt", flat=True
+            ).get(pk=serializer.instance.pk)
+            serializer.save(debt=debt)
+
+    def _paginated_nodes(self, queryset):
+        """Paginate a hierarchy queryset with the list serializer"""
+        paginator = StandardResultsSetPagination()
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True)
+    def ancestors(self, request, pk=None):
+        """Full supply chain above the node, from the factory down"""
+        node = self.get_object()
+        return self._paginated_nodes(node.get_ancestors())
+
+    @action(detail=True)
+    def descendants(self, request, pk=None):
+        """All clients below the node, level by level"""
+        node = self.get_object()
+        return self._paginated_nodes(
+            node.get_descendants().order_by("level", "id")
+        )
+
+    @action(detail=True)
+    def subtree(self, request, pk=None):
+        """The node with its clients down to ``?depth=`` levels below it"""
+        node = self.get_object()
+        depth = request.query_params.get("depth")
+        if depth is not None:
+            try:
+                depth = int(depth)
+            except ValueError:
+                depth = -1
+            if depth < 0:
+                raise serializers.ValidationError(
+                    {"depth": "A non-negative integer is required."}
+                )
+        return self._paginated_nodes(
+            node.get_subtree(depth).order_by("level", "id")
+        )
+
+    @action(detail=False)
+    def export(self, request):
+        """Stream filtered nodes as NDJSON or CSV"""
+        return export_response(
+            request,
+            self.filter_queryset(self.get_queryset()),
+            self.export_fields,
+            "nodes",
+        )
+
+    @action(detail=False, methods=["post"])
+    def bulk_create(self, request):
+        """Import a list of nodes with their hierarchy in one transaction"""
+        if not isinstance(request.data, list):
+            raise serializers.ValidationError(
+                {"non_field_errors": ["Expected a list of nodes."]}
+            )
+        try:
+            nodes = import_nodes(request.data)
+        except NodeImportError as error:
+            return Response(
+                {"errors": error.errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(
+            {"created": len(nodes), "ids": [node.pk for node in nodes]},
+            status=status.HTTP_201_CREATED,
+        )
 
     @action(detail=True, methods=["post"])
     def clear_debt(self, request, pk=None):
         """Custom endpoint to clear debt for a specific node"""
         node = self.get_object()
-        node.debt = 0
-        node.save()
+        NetworkNode.clear_debts(NetworkNode.objects.filter(pk=node.pk))
         return Response({"status": "debt cleared"})
 
     @action(detail=False)
+    def tree(self, request):
+        """The whole supplier tree, cached until the next node write"""
+        return Response(get_network_tree())
+
+    @action(detail=False)
+    @coalesce()
     def statistics(self, request):
-        """Aggregated statistics about network nodes"""
+        """Aggregated statistics about network nodes, read from rollups"""
         stats = {
-            "total_nodes": NetworkNode.objects.count(),
-            "total_debt":
-                NetworkNode.objects.aggregate(Sum("debt"))["debt__sum"] or 0,
-            "nodes_by_level": dict(
-                NetworkNode.objects.values("level")
-                .annotate(count=Count("id"))
-                .values_list("level", "count")
-            ),
-            "nodes_by_country": dict(
-                NetworkNode.objects.values("country")
-                .annotate(count=Count("id"))
-                .values_list("country", "count")
-            ),
+            "total_nodes": 0,
+            "total_debt": 0,
+            "nodes_by_level": {},
+            "nodes_by_country": {},
         }
+        rows = NetworkStatistic.objects.filter(node_count__gt=0)
+        for row in rows:
+            if row.dimension == NetworkStatistic.TOTAL:
+                stats["total_nodes"] = row.node_count
+                stats["total_debt"] = row.total_debt
+            elif row.dimension == NetworkStatistic.LEVEL:
+                stats["nodes_by_level"][int(row.key)] = row.node_count
+            else:
+                stats["nodes_by_country"][row.key] = row.node_count
         return Response(stats)
 
+    @action(detail=False)
+    def debt_history(self, request):
+        """Debt series from snapshots, bucketed by day or month"""
+        params = DebtHistoryQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        if params["period"] == DebtSnapshot.DAY:
+            snapshots = DebtSnapshot.objects.filter(period=DebtSnapshot.DAY)
+            bucket = F("date")
+        else:
+            snapshots = DebtSnapshot.month_ends()
+            bucket = TruncMonth("date")
+        if "since" in params:
+            snapshots = snapshots.filter(date__gte=params["since"])
+        if "until" in params:
+            snapshots = snapshots.filter(date__lte=params["until"])
+        for name in ("node", "country", "node_type", "level"):
+            if name in params:
+                snapshots = snapshots.filter(**{name: params[name]})
+
+        columns = ["bucket"]
+        if "group_by" in params:
+            snapshots = snapshots.annotate(group=F(params["group_by"]))
+            columns.append("group")
+        buckets = (
+            snapshots.annotate(bucket=bucket)
+            .values(*columns)
+            .annotate(total_debt=Sum("debt"), node_count=Count("id"))
+            .order_by(*columns)
+        )
+        serializer = DebtHistoryBucketSerializer(
+            [{**row, "date": row["bucket"]} for row in buckets], many=True
+        )
+        return Response({
+            "period": params["period"],
+            "results": serializer.data,
+        })
+
+    @action(detail=False)
+    @coalesce()
+    def debt_report(self, request):
+        """Debt by supplier, node type and country with the top debtors"""
+        params = DebtReportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(get_debt_report(params.validated_data["top"]))
+
+    @action(detail=False, permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """Response cache and coalescing counters, for staff"""
+        return Response({
+            **response_cache_stats([NetworkNode, Product]),
+            "coalescing": coalescing_stats(),
+        })
+
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(
+    ConditionalGetMixin, CachedResponseMixin, FastListMixin,
+    SparseFieldsetMixin, BatchLookupMixin, viewsets.ModelViewSet,
+):
     """
     API endpoint for product management.
     Provides standard CRUD operations with filtering and ordering.
@@ -85,14 +440,164 @@ class ProductViewSet(viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsActiveEmployee]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [
+        DjangoFilterBackend, FullTextSearchFilter, OrderingFilter
+    ]
     filterset_fields = ["release_date", "model"]
     search_fields = ["name", "model"]
     ordering_fields = ["price", "release_date", "name"]
-    pagination_class = StandardResultsSetPagination
+    pagination_class = ProductCursorPagination
+    fast_list_related = {"nodes": product_nodes}
+    cache_models = [Product, NetworkNode]
+    query_budgets = {"list": 2, "retrieve": 2, "batch": 2}
+    export_fields = [
+        "id", "name", "model", "release_date", "price", "quantity"
+    ]
 
     def get_queryset(self):
         """
-        Optimize queries with prefetch_related for the nodes M2M relationship
+        Optimize queries with prefetch_related for the nodes M2M relationship,
+        skipped when the response leaves ``nodes`` out
         """
-        return Product.objects.prefetch_related("nodes").all()
+        queryset = super().get_queryset()
+        if self.wants_field("nodes"):
+            queryset = queryset.prefetch_related(Prefetch(
+                "nodes",
+                queryset=NetworkNode.objects.only("id", "name").order_by("id"),
+            ))
+        return queryset
+
+    @action(detail=False)
+    def export(self, request):
+        """Stream filtered products with their node ids as NDJSON or CSV"""
+        return export_response(
+            request,
+            self.filter_queryset(self.get_queryset()),
+            self.export_fields,
+            "products",
+            with_nodes=True,
+        )
+
+    @action(detail=False, methods=["post"])
+    def bulk_upsert(self, request):
+        """Create or update a list of products with their node assignments"""
+        if not isinstance(request.data, list):
+            raise serializers.ValidationError(
+                {"non_field_errors": ["Expected a list of products."]}
+            )
+        return Response(upsert_products(request.data))
+
+
+class ChangeFeedViewSet(viewsets.GenericViewSet):
+    """
+    Feed of node and product changes for incremental sync.
+
+    ``?since=`` takes the ``next_since`` value of the previous page and
+    returns the following change log entries in order, optionally only
+    for one ``?entity=``. Created and updated entries carry the current
+    data of their object, deleted ones are tombstones. Entries are
+    ordered by transaction and only served once every older transaction
+    has finished, so transactions committing out of id order are not
+    skipped. ``next_since`` is a ``<transaction>.<id>`` token; a plain
+    id from older clients starts at that id of the first transaction.
+    """
+
+    queryset = ChangeLog.objects.all()
+    serializer_class = ChangeLogSerializer
+    permission_classes = [IsAuthenticated]
+    page_size = 100
+    max_page_size = 1000
+    query_budgets = {"list": 4}
+
+    def list(self, request):
+        """Change log entries after the ``since`` cursor"""
+        since = self._cursor_param("since")
+        limit = min(
+            self._int_param("limit", self.page_size, minimum=1),
+            self.max_page_size,
+        )
+        transaction_id, entry_id = since
+        entries = ChangeLog.committed().filter(
+            Q(transaction_id__gt=transaction_id)
+            | Q(transaction_id=transaction_id, id__gt=entry_id)
+        )
+        entity = request.query_params.get("entity")
+        if entity is not None:
+            if entity not in dict(ChangeLog.ENTITIES):
+                raise serializers.ValidationError(
+                    {"entity": [f"Unknown entity: {entity}."]}
+                )
+            entries = entries.filter(entity=entity)
+
+        entries = list(
+            entries.order_by("transaction_id", "id")[:limit + 1]
+        )
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        current = self._current_data(entries)
+        results = []
+        for entry, item in zip(
+            entries, self.get_serializer(entries, many=True).data
+        ):
+            item["data"] = current.get((entry.entity, entry.object_id))
+            results.append(item)
+        if entries:
+            since = entries[-1].transaction_id, entries[-1].id
+        return Response({
+            "results": results,
+            "next_since": "{}.{}".format(*since),
+            "has_more": has_more,
+        })
+
+    def _current_data(self, entries):
+        """Serialize the live objects of created and updated entries."""
+        ids = {ChangeLog.NODE: set(), ChangeLog.PRODUCT: set()}
+        for entry in entries:
+            if entry.action != ChangeLog.DELETED:
+                ids[entry.entity].add(entry.object_id)
+        nodes = NetworkNode.objects.filter(pk__in=ids[ChangeLog.NODE])
+        products = Product.objects.filter(
+            pk__in=ids[ChangeLog.PRODUCT]
+        ).prefetch_related(Prefetch(
+            "nodes",
+            queryset=NetworkNode.objects.only("id", "name").order_by("id"),
+        ))
+        current = {}
+        for entity, queryset, serializer_class in (
+            (ChangeLog.NODE, nodes, NetworkNodeSerializer),
+            (ChangeLog.PRODUCT, products, ProductSerializer),
+        ):
+            if not ids[entity]:
+                continue
+            data = serializer_class(
+                queryset, many=True, context=self.get_serializer_context()
+            ).data
+            current.update(((entity, item["id"]), item) for item in data)
+        return current
+
+    def _cursor_param(self, name):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return 0, 0
+        parts = value.split(".")
+        if len(parts) == 1:
+            parts.insert(0, "0")
+        if len(parts) != 2 or not all(part.isdigit() for part in parts):
+            raise serializers.ValidationError(
+                {name: ["A next_since value is required."]}
+            )
+        return int(parts[0]), int(parts[1])
+
+    def _int_param(self, name, default, minimum):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return default
+        try:
+            value = int(value)
+        except ValueError:
+            value = None
+        if value is None or value < minimum:
+            raise serializers.ValidationError(
+                {name: [f"An integer of at least {minimum} is required."]}
+            )
+        return value
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "network.query_budget.QueryBudgetMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -85,6 +86,10 @@ DATABASES = {
     }
 }
 
+# Full-text and trigram search lookups
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    INSTALLED_APPS.append("django.contrib.postgres")
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -128,6 +133,68 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# The default cache holds the generation counters that invalidate cached
+# data and the cache statistics. Deployments with several worker processes
+# need a shared backend here, e.g. Redis or Memcached.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "NETWORK_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("NETWORK_CACHE_LOCATION", "network-default"),
+    },
+    "responses": {
+        "BACKEND": os.getenv(
+            "NETWORK_RESPONSE_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv(
+            "NETWORK_RESPONSE_CACHE_LOCATION", "network-responses"
+        ),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(
+                os.getenv("NETWORK_RESPONSE_CACHE_MAX_ENTRIES", 1000)
+            ),
+        },
+    },
+}
+
+# Network application
+# Seconds a built supplier tree stays cached; node writes invalidate it.
+NETWORK_TREE_CACHE_TIMEOUT = int(
+    os.getenv("NETWORK_TREE_CACHE_TIMEOUT", 300)
+)
+# Seconds a coalesced aggregate response is reused by identical requests,
+# and whether workers of other processes share it through the default
+# cache, which then has to be shared by the workers (see CACHES above).
+NETWORK_COALESCE_TTL = float(os.getenv("NETWORK_COALESCE_TTL", 1))
+NETWORK_COALESCE_SHARED = (
+    os.getenv("NETWORK_COALESCE_SHARED", "False").lower() == "true"
+)
+# Query budgets of API actions: raise instead of logging when exceeded, and
+# queries allowed on top of each budget for session and user loading.
+NETWORK_QUERY_BUDGET_RAISE = (
+    os.getenv("NETWORK_QUERY_BUDGET_RAISE", str(DEBUG)).lower() == "true"
+)
+NETWORK_QUERY_BUDGET_OVERHEAD = int(
+    os.getenv("NETWORK_QUERY_BUDGET_OVERHEAD", 3)
+)
+# Build list responses from values() rows instead of model serializers.
+NETWORK_FAST_LIST_SERIALIZATION = (
+    os.getenv("NETWORK_FAST_LIST_SERIALIZATION", "False").lower() == "true"
+)
+# Cache alias and seconds list/detail responses are cached; writes
+# invalidate them. 0 disables the response cache.
+NETWORK_RESPONSE_CACHE = "responses"
+NETWORK_RESPONSE_CACHE_TIMEOUT = int(
+    os.getenv("NETWORK_RESPONSE_CACHE_TIMEOUT", 0)
+)
+# Seconds a computed debt report is reused; 0 computes it on every request.
+NETWORK_DEBT_REPORT_CACHE_TIMEOUT = int(
+    os.getenv("NETWORK_DEBT_REPORT_CACHE_TIMEOUT", 300)
+)
+
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -135,4 +202,15 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "network.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "network.renderers.MessagePackRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "network.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+        "network.renderers.MessagePackParser",
+    ],
 }